@@ -14,6 +14,79 @@ print_message () {
     echo -e "${left_filler_len// /$symbol}$message${right_filler_len// /$symbol}\033[0m"
 }
 
+# С --parallel [N] проекты тестируются одновременно, тесты каждого
+# делятся на N частей (по умолчанию по числу процессоров), у каждой
+# части своя тестовая база в .test_cache, её оставляют между прогонами.
+# После прогона печатается профиль времени тестов, по нему следующий
+# прогон делит тесты на части примерно поровну.
+if [[ "$1" == "--parallel" ]]; then
+    parallel=1
+    jobs=${2:-$(nproc)}
+fi
+cache_dir="$(pwd)/.test_cache"
+
+start_shards () {
+    # Запускает тесты проекта (первый аргумент) с модулем настроек
+    # (второй аргумент) в $jobs фоновых процессах, их PID — в shard_pids.
+    local project=$1
+    rm -f "$cache_dir/$project"-*.log "$cache_dir/$project"-*.json
+    for shard in $(seq 1 $jobs); do
+        (
+            cd $project
+            export DJANGO_SETTINGS_MODULE=$2
+            export DJANGO_TEST_DB="$cache_dir/$project-$shard.sqlite3"
+            # Значения опций через «=»: иначе pytest принимает их
+            # за пути к тестам и ищет rootdir выше проекта.
+            pytest --tb=line --reuse-db --shard=$shard/$jobs \
+                --durations-in="$cache_dir/$project.json" \
+                --durations-out="$cache_dir/$project-$shard.json" \
+                > "$cache_dir/$project-$shard.log" 2>&1
+            status=$?
+            # Код 5 — в часть не попало ни одного теста.
+            if [[ $status -eq 5 ]]; then exit 0; fi
+            exit $status
+        ) &
+        shard_pids+=($!)
+    done
+}
+
+wait_shards () {
+    # Ждёт процессы из аргументов, печатает логи и профиль проекта
+    # (первый аргумент) и возвращает код первой упавшей части.
+    local project=$1
+    shift
+    local status=0
+    local rc
+    for pid in "$@"; do
+        wait $pid
+        rc=$?
+        [[ $status -eq 0 && $rc -ne 0 ]] && status=$rc
+    done
+    # Страховка на случай, если код части где-то потеряется: итог
+    # pytest с упавшими тестами в логе — тоже падение.
+    if [[ $status -eq 0 ]] && grep -qE '[0-9]+ (failed|errors?)\b' \
+        "$cache_dir/$project"-*.log; then
+        status=1
+    fi
+    cat "$cache_dir/$project"-*.log 1>&2
+    python tests_profile.py "$cache_dir" "$project" 1>&2
+    return $status
+}
+
+run_parallel () {
+    mkdir -p "$cache_dir"
+    shard_pids=()
+    start_shards ya_news yanews.settings
+    local news_pids=("${shard_pids[@]}")
+    shard_pids=()
+    start_shards ya_note yanote.settings
+    local note_pids=("${shard_pids[@]}")
+    wait_shards ya_news "${news_pids[@]}"
+    news_status=$?
+    wait_shards ya_note "${note_pids[@]}"
+    note_status=$?
+}
+
 
 if python -m flake8 --config=setup.cfg 1>&2;
 then
@@ -21,6 +94,20 @@ then
     echo $LF 1>&2
     if python structure_test.py
     then
+        if [[ -n "$parallel" ]]; then
+            run_parallel
+            if [[ $news_status -ne 0 ]]; then
+                print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+                echo \`\`\` 1>&2
+                exit $news_status
+            fi
+            if [[ $note_status -ne 0 ]]; then
+                print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+                echo \`\`\` 1>&2
+                exit $note_status
+            fi
+            exit 0
+        fi
         cd ya_news
         export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
         if pytest --tb=line 1>&2;
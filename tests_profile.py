@@ -0,0 +1,37 @@
+"""
+Профиль времени тестов после параллельного прогона run_tests.sh.
+
+Объединяет время тестов из всех частей проекта в один JSON, по нему
+следующий прогон делит тесты на части примерно поровну, и печатает
+время каждой части и самые долгие тесты.
+
+    python tests_profile.py .test_cache ya_news
+"""
+import json
+import sys
+from pathlib import Path
+
+TOP = 10
+
+
+def main(cache_dir, project):
+    cache_dir = Path(cache_dir)
+    durations = {}
+    shards = []
+    for path in sorted(cache_dir.glob(f'{project}-*.json')):
+        with open(path) as file:
+            shard = json.load(file)
+        durations.update(shard)
+        shards.append((path.stem, len(shard), sum(shard.values())))
+    with open(cache_dir / f'{project}.json', 'w') as file:
+        json.dump(durations, file, indent=1, sort_keys=True)
+    print(f'Время тестов {project}:')
+    for name, count, total in shards:
+        print(f'  {name}: {count} тестов, {total:.2f} с')
+    slowest = sorted(durations.items(), key=lambda item: -item[1])[:TOP]
+    for nodeid, duration in slowest:
+        print(f'  {duration:>7.3f} с  {nodeid}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,131 @@
+"""
+Параллельные запросы к страницам чтения: WSGI, ASGI и async-версии.
+
+Каждый режим запускается в своём процессе, потому что асинхронные
+URL выбираются при импорте urls.py:
+
+* wsgi — синхронные view, CONCURRENCY потоков с тестовым клиентом,
+  как у многопоточного WSGI-сервера;
+* asgi — синхронные view под ASGIHandler, CONCURRENCY одновременных
+  запросов через AsyncClient;
+* asgi-async — то же, но news:home и news:detail из news/async_views.py.
+
+Все режимы прогоняются дважды: с SQLite как есть и с задержкой
+DB_LATENCY на каждый запрос к базе, как у сетевой базы данных.
+Без задержки страницы упираются в рендеринг шаблонов под GIL,
+и асинхронный путь выигрывать не может.
+
+    python -m benchmarks.async_views
+"""
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup, temporary_database
+from benchmarks.throughput import NEWS_COUNT, seed
+
+CONCURRENCY = 16
+REQUESTS = 2_000
+DB_LATENCIES = (0.0, 0.002)
+MODES = {
+    'wsgi': '',
+    'asgi': '',
+    'asgi-async': 'news:home,news:detail',
+}
+
+
+def urls(news_id):
+    """Главная и страницы новостей вперемешку, одинаковые для режимов."""
+    rng = random.Random(0)
+    return [
+        '/' if index % 4 == 0
+        else f'/news/{news_id + rng.randrange(NEWS_COUNT)}/'
+        for index in range(REQUESTS)
+    ]
+
+
+def run_wsgi(paths):
+    from django.test import Client
+
+    def worker(chunk):
+        client = Client()
+        for path in chunk:
+            client.get(path)
+
+    chunks = [paths[index::CONCURRENCY] for index in range(CONCURRENCY)]
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(worker, chunks))
+
+
+def run_asgi(paths):
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def fetch(path):
+            async with semaphore:
+                await client.get(path)
+
+        await asyncio.gather(*(fetch(path) for path in paths))
+
+    asyncio.run(main())
+
+
+def add_latency(latency):
+    """Каждый запрос к базе в каждом потоке ждёт latency секунд."""
+    from django.db.backends.signals import connection_created
+
+    def wait(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def connected(sender, connection, **kwargs):
+        # Объект соединения потока один и тот же при переподключениях.
+        if wait not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wait)
+
+    connection_created.connect(connected, weak=False)
+
+
+def measure(mode, latency):
+    setup()
+    from django.conf import settings
+    from django.core.cache import cache
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    with temporary_database():
+        if latency:
+            add_latency(latency)
+        paths = urls(seed())
+        cache.clear()
+        run = run_wsgi if mode == 'wsgi' else run_asgi
+        started = time.perf_counter()
+        run(paths)
+        elapsed = time.perf_counter() - started
+    print(f'  {mode:<11} {REQUESTS / elapsed:>8.1f} запросов/с')
+
+
+def main():
+    if len(sys.argv) > 1:
+        measure(sys.argv[1], float(sys.argv[2]))
+        return
+    print(f'{REQUESTS} запросов, {CONCURRENCY} одновременно')
+    for latency in DB_LATENCIES:
+        print(f'задержка базы {latency * 1000:.0f} мс на запрос:')
+        for mode, async_views in MODES.items():
+            subprocess.run(
+                [sys.executable, '-m', 'benchmarks.async_views',
+                 mode, str(latency)],
+                env={**os.environ, 'DJANGO_ASYNC_VIEWS': async_views},
+                check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Накладные расходы диспетчеризации NewsDetailView на один запрос.
+
+Раньше NewsDetailView вызывал NewsDetail.as_view() и
+NewsComment.as_view() на каждый запрос, теперь view собраны
+при импорте. Запуск из каталога ya_news:
+
+    python -m benchmarks.detail_dispatch
+
+Сравнивается только сборка view для GET, сам запрос одинаков
+в обоих случаях.
+"""
+import timeit
+
+from benchmarks import setup
+
+NUMBER = 100_000
+
+
+def main():
+    setup()
+    from news.views import NewsDetail, NewsDetailView
+
+    rebuilt = min(timeit.repeat(
+        NewsDetail.as_view,
+        number=NUMBER, repeat=5,
+    )) / NUMBER
+    prebuilt = min(timeit.repeat(
+        lambda: NewsDetailView.method_handlers['get'],
+        number=NUMBER, repeat=5,
+    )) / NUMBER
+    print(f'as_view() на каждый запрос: {rebuilt * 1e6:.2f} мкс')
+    print(f'готовый view:               {prebuilt * 1e6:.2f} мкс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Загрузка большой фикстуры: loaddata против stream_loaddata.
+
+Фикстура генерируется в формате news.json: новости и комментарии
+к ним. Для каждой команды замеряются время и пик памяти Python
+(tracemalloc), база между прогонами очищается:
+
+    python -m benchmarks.fixture_load
+"""
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from benchmarks import setup, temporary_database
+
+NEWS_COUNT = 10_000
+COMMENTS_PER_NEWS = 5
+
+
+def write_fixture(path, author_id):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('[\n')
+        for pk in range(1, NEWS_COUNT + 1):
+            json.dump({
+                'model': 'news.news', 'pk': pk,
+                'fields': {
+                    'title': f'Новость {pk}', 'text': 'Текст ' * 50,
+                    'date': '2022-11-01',
+                },
+            }, file, ensure_ascii=False)
+            file.write(',\n')
+        comments = NEWS_COUNT * COMMENTS_PER_NEWS
+        for pk in range(1, comments + 1):
+            json.dump({
+                'model': 'news.comment', 'pk': pk,
+                'fields': {
+                    'news': pk % NEWS_COUNT + 1, 'author': author_id,
+                    'text': f'Комментарий {pk}',
+                    'created': '2022-11-01T10:00:00Z',
+                },
+            }, file, ensure_ascii=False)
+            file.write(',\n' if pk < comments else '\n')
+        file.write(']\n')
+
+
+def measure(command, path):
+    from django.core.management import call_command
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    call_command(command, path, verbosity=0, stdout=StringIO())
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    setup()
+    from django.contrib.auth import get_user_model
+    from news.models import News
+
+    with temporary_database(), tempfile.TemporaryDirectory() as directory:
+        author = get_user_model().objects.create(username='bench')
+        path = os.path.join(directory, 'news.json')
+        write_fixture(path, author.pk)
+        size = os.path.getsize(path) / 1024 / 1024
+        print(f'фикстура: {size:.1f} МБ')
+        for command in ('loaddata', 'stream_loaddata'):
+            News.objects.all().delete()
+            elapsed, peak = measure(command, path)
+            print(
+                f'{command:<16} {elapsed:>7.1f} с, '
+                f'пик памяти {peak / 1024 / 1024:>7.1f} МБ'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Сравнение проверки комментария старым циклом и BadWordsMatcher.
+
+Запуск из каталога ya_news:
+
+    python -m benchmarks.profanity
+"""
+import random
+import string
+import timeit
+
+from news.moderation import BadWordsMatcher
+
+SIZES = (10, 1_000, 50_000)
+COMMENT_WORDS = 200
+REPEAT = 5
+
+
+def legacy_check(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def random_word(rng):
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10)))
+
+
+def main():
+    rng = random.Random(0)
+    text = ' '.join(random_word(rng) for _ in range(COMMENT_WORDS))
+    print(f'{"words":>8} {"loop, ms":>10} {"matcher, ms":>12}')
+    for size in SIZES:
+        words = [random_word(rng) + 'zz' for _ in range(size)]
+        # Половина записей — основы, чтобы проверить и поиск по началу.
+        matcher = BadWordsMatcher(
+            word + '*' if index % 2 else word
+            for index, word in enumerate(words)
+        )
+        loop = min(timeit.repeat(
+            lambda: legacy_check(words, text), number=10, repeat=REPEAT
+        )) / 10
+        compiled = min(timeit.repeat(
+            lambda: matcher.search(text), number=10, repeat=REPEAT
+        )) / 10
+        print(f'{size:>8} {loop * 1000:>10.3f} {compiled * 1000:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
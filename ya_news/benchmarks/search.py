@@ -0,0 +1,92 @@
+"""
+Поиск по новостям: FTS5-индекс против icontains.
+
+Новости заполняются случайным текстом из частых слов и редких
+терминов. На 100 тысячах и миллионе новостей замеряется время
+одной выдачи из SEARCH_RESULTS_LIMIT новостей для частого слова
+и для редкого термина, который icontains ищет полным просмотром:
+
+    python -m benchmarks.search
+"""
+import random
+import time
+from io import StringIO
+
+from benchmarks import setup, temporary_database
+
+SIZES = (100_000, 1_000_000)
+WORDS_PER_NEWS = 30
+RARE_TERMS = 50_000
+REPEATS = 20
+COMMON_WORDS = (
+    'новости', 'город', 'погода', 'сегодня', 'жители', 'власти',
+    'проект', 'школа', 'дорога', 'выставка', 'концерт', 'праздник',
+    'футбол', 'команда', 'рынок', 'цены', 'музей', 'театр', 'парк',
+    'станция',
+)
+
+
+def seed(start, stop, rng):
+    from news.models import News
+
+    News.objects.bulk_create(
+        (
+            News(
+                title=f'Новость {index}',
+                text=' '.join(
+                    rng.choice(COMMON_WORDS) if rng.random() < 0.9
+                    else f'термин{rng.randrange(RARE_TERMS)}'
+                    for _ in range(WORDS_PER_NEWS)
+                ),
+            )
+            for index in range(start, stop)
+        ),
+        batch_size=10_000,
+    )
+
+
+def measure(search):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        search()
+    return (time.perf_counter() - started) / REPEATS * 1000
+
+
+def main():
+    setup()
+    from django.conf import settings
+    from django.core.management import call_command
+    from news.models import News
+    from news.search import NEWS_INDEX
+
+    limit = settings.SEARCH_RESULTS_LIMIT
+    rng = random.Random(0)
+    with temporary_database():
+        seeded = 0
+        for size in SIZES:
+            seed(seeded, size, rng)
+            seeded = size
+            started = time.perf_counter()
+            call_command('rebuild_search_index', stdout=StringIO())
+            print(
+                f'{size} новостей, индекс построен за '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+            for label, query in (
+                ('частое слово', 'погода'),
+                ('редкий термин', 'термин12345'),
+            ):
+                icontains = measure(lambda: list(
+                    News.objects.filter(text__icontains=query)[:limit]
+                ))
+                fts = measure(lambda: NEWS_INDEX.search(
+                    News.objects.all(), query
+                ))
+                print(
+                    f'  {label:<14} icontains {icontains:>8.2f} мс, '
+                    f'FTS5 {fts:>8.2f} мс'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Пропускная способность главной страницы и страницы новости.
+
+Запросы идут через WSGI-обработчик Django в том же процессе,
+без сети, поэтому видна разница только в работе самого Django
+и базы. Сравнить профили:
+
+    python -m benchmarks.throughput
+    export DJANGO_SECRET_KEY=bench
+    DJANGO_ENV=production python -m benchmarks.throughput
+"""
+import time
+
+from benchmarks import setup, temporary_database
+
+NEWS_COUNT = 1_000
+COMMENTS_PER_NEWS = 20
+DURATION = 5
+
+
+def seed():
+    from django.contrib.auth import get_user_model
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст ' * 50)
+        for index in range(NEWS_COUNT)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in News.objects.all()
+        for index in range(COMMENTS_PER_NEWS)
+    )
+    return News.objects.values_list('pk', flat=True).first()
+
+
+def measure(client, url):
+    requests = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < DURATION:
+        client.get(url)
+        requests += 1
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    setup()
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+
+    with temporary_database():
+        news_id = seed()
+        client = Client(SERVER_NAME='localhost')
+        print(f'профиль: {settings.ENVIRONMENT}')
+        for name, url in (
+            ('news:home', reverse('news:home')),
+            ('news:detail', reverse('news:detail', args=(news_id,))),
+        ):
+            cache.clear()
+            print(f'{name:<12} {measure(client, url):>8.1f} запросов/с')
+
+
+if __name__ == '__main__':
+    main()
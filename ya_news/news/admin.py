@@ -1,15 +1,299 @@
+"""
+Админка новостей и комментариев, рассчитанная на большие таблицы.
+
+Списки не считают COUNT(*) по всей таблице, на странице новости
+показываются только последние комментарии, а связанные объекты
+выбираются через автодополнение, а не <select> со всеми строками.
+Действия над комментариями работают пачками, см. news/bulk_actions.py.
+"""
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Max, Min
+from django.forms.models import BaseInlineFormSet
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
+from .bulk_actions import count_matching, moderate
 from .models import Comment, News
+from .search import COMMENT_INDEX, NEWS_INDEX
+
+LATEST_COMMENTS = 20
+
+User = get_user_model()
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator без COUNT(*) по всей таблице.
+
+    Строки точно считаются только до exact_count_limit: COUNT идёт
+    по подзапросу с LIMIT. Если строк больше, то без фильтров их число
+    оценивается по наибольшему и наименьшему pk, которые SQLite берёт
+    из индекса, а с фильтрами считается равным пределу.
+    """
+
+    exact_count_limit = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        count = queryset.order_by()[:self.exact_count_limit + 1].count()
+        if count <= self.exact_count_limit or queryset.query.where:
+            return count
+        # MIN и MAX SQLite берёт из индекса, только когда в запросе
+        # один агрегат, поэтому запросов два.
+        manager = queryset.model._default_manager
+        first = manager.aggregate(pk=Min('pk'))['pk']
+        last = manager.aggregate(pk=Max('pk'))['pk']
+        return max(last - first + 1, count)
+
+
+class IndexSearchMixin:
+    """
+    Поиск в списке и автодополнении через FTS-индекс.
+
+    icontains по search_fields перебирает всю таблицу, а индекс
+    отдаёт search_limit лучших совпадений. search_fields всё равно
+    нужны: без них Django не показывает поиск и автодополнение.
+    """
+
+    search_index = None
+    search_limit = 100
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = self.search_index.ids(search_term, limit=self.search_limit)
+        return queryset.filter(pk__in=ids), False
+
+
+class LoadedObjectField(forms.ModelChoiceField):
+    """
+    Поле pk формы из набора, которое берёт объект из уже загруженных.
+
+    Обычное поле проверяет pk отдельным запросом для каждой формы.
+    """
+
+    def __init__(self, objects, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.objects = {str(obj.pk): obj for obj in objects}
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objects[str(value)]
+        except KeyError:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
+class LatestCommentsFormSet(BaseInlineFormSet):
+    """
+    Формы только для последних комментариев новости.
 
+    При отправке формы берутся комментарии с pk из неё, а не последние
+    на этот момент: иначе новый комментарий, добавленный после открытия
+    страницы, вытесняет из выборки самый старый из отправленных.
+    """
 
-class CommentInline(admin.StackedInline):
+    def get_queryset(self):
+        if not hasattr(self, '_latest'):
+            queryset = super().get_queryset().order_by('-created', '-pk')
+            if self.is_bound:
+                queryset = queryset.filter(pk__in=self.posted_ids())
+            else:
+                queryset = queryset[:LATEST_COMMENTS]
+            self._latest = self._queryset = queryset
+        return self._latest
+
+    def posted_ids(self):
+        name = self.model._meta.pk.name
+        ids = (
+            self.data.get(f'{self.add_prefix(index)}-{name}', '')
+            for index in range(self.initial_form_count())
+        )
+        return [pk for pk in ids if pk.isdigit()]
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        name = self._pk_field.name
+        field = form.fields[name]
+        form.fields[name] = LoadedObjectField(
+            self.get_queryset(), field.queryset,
+            initial=field.initial, required=False, widget=field.widget,
+        )
+
+
+class CommentInline(admin.TabularInline):
     model = Comment
+    formset = LatestCommentsFormSet
     extra = 0
+    fields = ('author', 'text', 'created', 'is_hidden')
+    readonly_fields = ('author', 'created', 'is_hidden')
+    verbose_name_plural = f'Последние {LATEST_COMMENTS} комментариев'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('author')
+
+    def has_add_permission(self, request, obj=None):
+        """Комментарии добавляются в CommentAdmin, где есть автор."""
+        return False
 
 
 @admin.register(News)
-class NewsAdmin(admin.ModelAdmin):
+class NewsAdmin(IndexSearchMixin, admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    list_display = ('title', 'date', 'comment_count', 'last_comment_at')
+    list_filter = ('date',)
+    date_hierarchy = 'date'
+    search_fields = ('title', 'text')
+    search_index = NEWS_INDEX
+    readonly_fields = ('comment_count', 'last_comment_at', 'all_comments')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        """Счётчики комментариев форма не пишет, их меняют сигналы."""
+        if change:
+            obj.save(update_fields=list(form.fields))
+        else:
+            obj.save()
+
+    @admin.display(description='Все комментарии')
+    def all_comments(self, news):
+        if news.pk is None:
+            return '-'
+        return format_html(
+            '<a href="{}?news__id__exact={}">{}</a>',
+            reverse('admin:news_comment_changelist'), news.pk,
+            news.comment_count,
+        )
+
+
+def moderation_action(
+    name, action, description, message, permission, bad_words=False,
+):
+    """Действие админки, которое меняет выбранные комментарии пачками."""
+    def admin_action(modeladmin, request, queryset):
+        changed = sum(moderate(action, queryset, bad_words))
+        modeladmin.message_user(request, f'{message}: {changed}.')
+
+    admin_action.__name__ = name
+    return admin.action(
+        description=description, permissions=(permission,)
+    )(admin_action)
+
+
+@admin.action(
+    description='Удалить все комментарии авторов выбранных',
+    permissions=('delete',),
+)
+def delete_authors_comments(modeladmin, request, queryset):
+    """
+    Удаляет все комментарии авторов выбранных, не только выбранные.
+
+    Сначала показывает страницу подтверждения с числом комментариев
+    и новостей, удаляет после повторной отправки с полем post.
+    """
+    author_ids = set(
+        queryset.order_by().values_list('author_id', flat=True).distinct()
+    )
+    comments = Comment.objects.filter(author_id__in=author_ids)
+    if not request.POST.get('post'):
+        comments_count, news_count = count_matching('delete', comments)
+        return TemplateResponse(
+            request, 'admin/news/comment/delete_authors_confirmation.html',
+            {
+                **modeladmin.admin_site.each_context(request),
+                'title': 'Вы уверены?',
+                'opts': modeladmin.model._meta,
+                'media': modeladmin.media,
+                'authors': User.objects.filter(
+                    pk__in=author_ids
+                ).order_by('username'),
+                'comments_count': comments_count,
+                'news_count': news_count,
+                'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+                'select_across': request.POST.get('select_across'),
+                'action': request.POST['action'],
+            },
+        )
+    changed = sum(moderate('delete', comments))
+    modeladmin.message_user(
+        request, f'Удалено комментариев авторов: {changed}.'
+    )
+
+
+@admin.register(Comment)
+class CommentAdmin(IndexSearchMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'author', 'news', 'created', 'is_hidden')
+    # Сам фильтр по дате не делает запросов, в отличие от date_hierarchy,
+    # а отфильтрованный список обслуживают индексы из Comment.Meta.
+    list_filter = ('created', 'is_hidden')
+    list_select_related = ('author', 'news')
+    # Индексы по (created, id) отдают страницу без сортировки
+    # и с фильтром по дате, и с фильтром по скрытым.
+    ordering = ('-created', '-id')
+    autocomplete_fields = ('author', 'news')
+    search_fields = ('text',)
+    search_index = COMMENT_INDEX
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (
+        moderation_action(
+            'delete_comments', 'delete',
+            'Удалить выбранные комментарии', 'Удалено комментариев',
+            'delete',
+        ),
+        moderation_action(
+            'hide_comments', 'hide',
+            'Скрыть выбранные комментарии', 'Скрыто комментариев',
+            'change',
+        ),
+        moderation_action(
+            'show_comments', 'show',
+            'Показать выбранные комментарии', 'Показано комментариев',
+            'change',
+        ),
+        moderation_action(
+            'hide_bad_comments', 'hide',
+            'Скрыть выбранные с запрещёнными словами',
+            'Скрыто комментариев с запрещёнными словами', 'change',
+            bad_words=True,
+        ),
+        delete_authors_comments,
+    )
+
+    def get_readonly_fields(self, request, obj=None):
+        """
+        Новость у существующего комментария не меняется.
+
+        Сигналы обновляют счётчики только при создании и удалении,
+        перенос комментария в другую новость сломал бы их у обеих.
+        """
+        if obj is not None:
+            return ('news',)
+        return ()
+
+    def get_actions(self, request):
+        """
+        Стандартное удаление заменено пачечным.
+
+        delete_selected загружает все объекты и удаляет их по одному,
+        отправляя сигналы.
+        """
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
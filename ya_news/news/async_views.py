@@ -0,0 +1,60 @@
+"""
+Асинхронные версии страниц чтения для ASGI.
+
+Синхронный view под ASGI Django выполняет в единственном потоке
+thread-sensitive, поэтому медленный запрос задерживает все остальные.
+В Django 3.2 ORM ещё не умеет работать асинхронно, поэтому GET и HEAD
+целиком — запросы к базе и рендеринг шаблона — выполняются в отдельном
+пуле из ASYNC_READ_WORKERS потоков, а цикл событий только ждёт
+результата. У каждого потока пула своё соединение с базой, как у потока
+WSGI-сервера. Остальные методы идут обычным путём Django.
+
+Какие URL обслуживаются асинхронно, задаёт настройка ASYNC_READ_VIEWS.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+READ_METHODS = ('GET', 'HEAD')
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_READ_WORKERS, thread_name_prefix='news-read'
+)
+
+
+def _respond(view, request, *args, **kwargs):
+    """Выполняет view и рендерит ответ в потоке пула."""
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def read_async(view):
+    """Асинхронная обёртка синхронного view."""
+    fallback = sync_to_async(view)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await fallback(request, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, partial(_respond, view, request, *args, **kwargs)
+        )
+
+    return wrapper
+
+
+def for_url(url_name, view):
+    """Асинхронная версия view, если URL есть в ASYNC_READ_VIEWS."""
+    if url_name in settings.ASYNC_READ_VIEWS:
+        return read_async(view)
+    return view
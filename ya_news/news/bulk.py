@@ -0,0 +1,65 @@
+"""Общие помощники для массовой загрузки данных через bulk_create."""
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import Max
+
+from .cache import HOME_VERSION_KEY, bump_news_version, bump_version
+from .counters import recount
+from .models import News
+from .search import COMMENT_INDEX, NEWS_INDEX
+
+
+def bulk_insert(model, objects):
+    """
+    Вставляет объекты одним bulk_create и возвращает их с pk.
+
+    SQLite не возвращает pk из bulk_create, поэтому новые строки
+    перечитываются по pk больше прежнего максимума. Вызывать внутри
+    транзакции, иначе в выборку попадут чужие строки.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objects)
+    last_id = model.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+    model.objects.bulk_create(objects)
+    return list(model.objects.filter(pk__gt=last_id).order_by('pk'))
+
+
+def news_created(news_list):
+    """Делает для новостей из bulk_create то, что сделали бы сигналы."""
+    NEWS_INDEX.add(news_list)
+    bump_version(HOME_VERSION_KEY)
+
+
+def comments_created(comments):
+    """Делает для комментариев из bulk_create то, что сделали бы сигналы."""
+    touched = {comment.news_id for comment in comments}
+    recount(News.objects.filter(pk__in=touched))
+    COMMENT_INDEX.add(comments)
+    for news_id in touched:
+        bump_news_version(news_id)
+
+
+@contextmanager
+def keep_dates(*models):
+    """
+    Отключает auto_now и auto_now_add у полей моделей внутри блока.
+
+    bulk_create заполняет такие поля текущим временем, а при загрузке
+    данных нужно сохранить даты из файла.
+    """
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,154 @@
+"""
+Массовая модерация комментариев: удаление, скрытие и показ пачками.
+
+Комментарии перебираются по pk пачками из chunk_size штук, каждая
+пачка меняется одним запросом в своей транзакции. Сигналы при этом
+не отправляются, поэтому счётчики новостей и поисковый индекс
+обновляются здесь же, одним UPDATE на пачку, а версии кэша новостей
+увеличиваются после фиксации транзакции.
+"""
+from django.db import connection, transaction
+
+from .cache import bump_news_version
+from .counters import recount
+from .forms import BAD_WORDS
+from .models import Comment, News
+from .moderation import get_matcher
+from .search import COMMENT_INDEX
+
+CHUNK_SIZE = 1000
+
+
+def matching_rows(queryset, bad_words=False, chunk_size=CHUNK_SIZE):
+    """
+    Пачки пар (pk, news_id) комментариев из queryset по возрастанию pk.
+
+    С bad_words в пачке остаются только комментарии с запрещёнными
+    словами. Matcher работает в Python, поэтому тексты читаются
+    через values_list, без создания объектов модели.
+    """
+    matcher = get_matcher(BAD_WORDS) if bad_words else None
+    fields = ('pk', 'news_id', 'text') if bad_words else ('pk', 'news_id')
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_id).order_by(
+            'pk'
+        ).values_list(*fields)[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        matched = [
+            row[:2] for row in rows
+            if matcher is None or matcher.search(row[2])
+        ]
+        if matched:
+            yield matched
+
+
+def _apply(rows, change):
+    ids = [pk for pk, _ in rows]
+    news_ids = {news_id for _, news_id in rows}
+    with transaction.atomic():
+        changed = change(ids)
+        recount(News.objects.filter(pk__in=news_ids))
+    for news_id in news_ids:
+        bump_news_version(news_id)
+    return changed
+
+
+def delete_comments(queryset):
+    """
+    Удаляет комментарии из queryset и их строки в индексе.
+
+    Два запроса на любое число комментариев, объекты не загружаются
+    и сигналы не отправляются: счётчики новостей пересчитывает
+    вызывающий код. На Comment не ссылаются другие модели, поэтому
+    удалять вместе с ним больше нечего.
+    """
+    if Comment._meta.related_objects:
+        raise TypeError(
+            'На Comment ссылаются другие модели, удаление одним DELETE '
+            'пропустило бы их on_delete.'
+        )
+    COMMENT_INDEX.remove_queryset(queryset)
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {Comment._meta.db_table} '
+            f'WHERE {Comment._meta.pk.column} IN ({sql})',
+            params,
+        )
+        return cursor.rowcount
+
+
+def _delete_ids(ids):
+    # QuerySet.delete() из-за сигналов Comment загрузил бы каждый
+    # объект и отправил сигналы по одному.
+    return delete_comments(Comment.objects.filter(pk__in=ids))
+
+
+def _hide_ids(ids):
+    count = Comment.objects.filter(
+        pk__in=ids, is_hidden=False
+    ).update(is_hidden=True)
+    COMMENT_INDEX.remove(ids)
+    return count
+
+
+def _show_ids(ids):
+    comments = Comment.objects.filter(pk__in=ids, is_hidden=True)
+    shown = list(comments.only('pk', *COMMENT_INDEX.fields))
+    comments.update(is_hidden=False)
+    COMMENT_INDEX.add(shown)
+    return len(shown)
+
+
+ACTIONS = {
+    'delete': _delete_ids,
+    'hide': _hide_ids,
+    'show': _show_ids,
+}
+
+
+def targets(action, queryset):
+    """Комментарии из queryset, которые действие может изменить."""
+    if action == 'hide':
+        return queryset.filter(is_hidden=False)
+    if action == 'show':
+        return queryset.filter(is_hidden=True)
+    return queryset
+
+
+def moderate(action, queryset, bad_words=False, chunk_size=CHUNK_SIZE):
+    """
+    Применяет действие из ACTIONS к комментариям из queryset.
+
+    Генератор: после каждой пачки отдаёт, сколько комментариев
+    в ней изменилось.
+    """
+    change = ACTIONS[action]
+    queryset = targets(action, queryset)
+    for rows in matching_rows(queryset, bad_words, chunk_size):
+        yield _apply(rows, change)
+
+
+def count_matching(
+    action, queryset, bad_words=False, chunk_size=CHUNK_SIZE
+):
+    """
+    Сколько комментариев и новостей изменит действие, ничего не меняя.
+
+    Без bad_words числа считаются двумя COUNT в базе.
+    """
+    queryset = targets(action, queryset)
+    if not bad_words:
+        return (
+            queryset.count(),
+            queryset.order_by().values('news_id').distinct().count(),
+        )
+    comments = 0
+    news_ids = set()
+    for rows in matching_rows(queryset, bad_words, chunk_size):
+        comments += len(rows)
+        news_ids.update(news_id for _, news_id in rows)
+    return comments, len(news_ids)
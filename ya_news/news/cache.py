@@ -0,0 +1,68 @@
+"""
+Версии кэшированных фрагментов страниц новостей.
+
+Фрагменты хранятся под ключом, в который входит версия новости,
+поэтому для сброса кэша достаточно увеличить версию: старые фрагменты
+больше не запрашиваются и вытесняются бэкендом кэша сами.
+"""
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+HOME_VERSION_KEY = 'news:version:home'
+NEWS_VERSION_KEY = 'news:version:{}'
+
+
+def _new_version():
+    """
+    Новая версия ключа: текущее время в наносекундах.
+
+    Версия берётся из времени, а не из счётчика, чтобы после
+    вытеснения ключа она не начиналась заново и не совпала с уже
+    выданной раньше.
+    """
+    return time.time_ns()
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(key):
+    # Не cache.incr: в FileBasedCache он сделан через get и set,
+    # параллельные увеличения теряются, а set ставит ключу время жизни
+    # по умолчанию. Запись новой версии атомарна в любом бэкенде,
+    # и при гонке обе записанные версии новые.
+    cache.set(key, _new_version(), None)
+
+
+def bump_version(key):
+    """
+    Меняет версию после фиксации текущей транзакции.
+
+    Если сменить её раньше, параллельный запрос может прочитать ещё
+    старые данные и закэшировать их уже под новой версией. Вне
+    транзакции версия меняется сразу.
+    """
+    transaction.on_commit(partial(_bump, key))
+
+
+def get_home_version():
+    return get_version(HOME_VERSION_KEY)
+
+
+def get_news_version(news_id):
+    return get_version(NEWS_VERSION_KEY.format(news_id))
+
+
+def bump_news_version(news_id):
+    """Сбрасывает фрагменты новости и главной страницы."""
+    bump_version(NEWS_VERSION_KEY.format(news_id))
+    bump_version(HOME_VERSION_KEY)
@@ -0,0 +1,59 @@
+"""
+Счётчики комментариев в новости: comment_count и last_comment_at.
+
+Каждое изменение — один UPDATE с F-выражениями или подзапросами,
+поэтому параллельные комментарии не теряют приращений.
+Скрытые комментарии в счётчики не входят.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, News
+
+
+def count_subquery():
+    return Coalesce(Subquery(
+        Comment.objects.filter(
+            news=OuterRef('pk'), is_hidden=False
+        ).order_by().values('news').annotate(
+            count=Count('id')
+        ).values('count')
+    ), 0)
+
+
+def last_comment_subquery():
+    return Subquery(
+        Comment.objects.filter(
+            news=OuterRef('pk'), is_hidden=False
+        ).order_by('-created').values('created')[:1]
+    )
+
+
+def comment_added(comment):
+    if comment.is_hidden:
+        return
+    created = Value(comment.created)
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment_at=Greatest(
+            Coalesce('last_comment_at', created), created
+        ),
+    )
+
+
+def comment_removed(comment):
+    """Вызывается, когда комментарий уже удалён из базы."""
+    if comment.is_hidden:
+        return
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=F('comment_count') - 1,
+        last_comment_at=last_comment_subquery(),
+    )
+
+
+def recount(queryset):
+    """Пересчитывает счётчики для новостей из queryset одним UPDATE."""
+    return queryset.update(
+        comment_count=count_subquery(),
+        last_comment_at=last_comment_subquery(),
+    )
@@ -0,0 +1,159 @@
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from news.bulk import bulk_insert, comments_created, keep_dates
+from news.forms import BAD_WORDS
+from news.models import Comment, News
+from news.moderation import get_matcher
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует комментарии из CSV или NDJSON потоком, пачками '
+        'через bulk_create. Поля строки: news (id новости), author '
+        '(имя пользователя), text и необязательное created.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с комментариями или «-».')
+        parser.add_argument(
+            '--format', choices=('csv', 'ndjson'),
+            help='Формат файла; по умолчанию — по расширению.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Сколько строк записывать за один bulk_create.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        self.matcher = get_matcher(BAD_WORDS)
+        self.news_ids = set()
+        self.author_ids = {}
+        self.rejected = 0
+        imported = 0
+        started = time.monotonic()
+        with self.open(path) as file, keep_dates(Comment):
+            rows = self.read(file, file_format)
+            while True:
+                chunk = list(islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+                imported += self.import_chunk(chunk)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Импортировано: {imported}, отклонено: '
+                    f'{self.rejected}, {imported / elapsed:.0f} строк/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {imported} комментариев, отклонено {self.rejected}.'
+        ))
+
+    @contextmanager
+    def open(self, path):
+        if path == '-':
+            yield sys.stdin
+            return
+        try:
+            file = open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with file:
+            yield file
+
+    @staticmethod
+    def read(file, file_format):
+        if file_format == 'csv':
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Битая строка отклоняется в clean, как и другие.
+                    yield None
+
+    @staticmethod
+    def clean(row, now):
+        """
+        Поля строки (news_id, author, text, created) или None.
+
+        None — если строку нельзя разобрать: это не объект, нет news
+        или author, news не число или created не дата.
+        """
+        if not isinstance(row, dict):
+            return None
+        try:
+            news_id = int(row['news'])
+            author = row['author']
+        except (KeyError, TypeError, ValueError):
+            return None
+        text = row.get('text') or ''
+        if not isinstance(author, str) or not isinstance(text, str):
+            return None
+        created = row.get('created')
+        if not created:
+            return news_id, author, text, now
+        try:
+            created = parse_datetime(created)
+        except (TypeError, ValueError):
+            return None
+        if created is None:
+            return None
+        if timezone.is_naive(created):
+            created = timezone.make_aware(created)
+        return news_id, author, text, created
+
+    def resolve(self, rows):
+        """Догружает в словари id новостей и авторов, которых ещё нет."""
+        news_ids = {row[0] for row in rows} - self.news_ids
+        if news_ids:
+            self.news_ids.update(News.objects.filter(
+                pk__in=news_ids
+            ).values_list('pk', flat=True))
+        usernames = {row[1] for row in rows} - self.author_ids.keys()
+        if usernames:
+            self.author_ids.update(User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'pk'))
+
+    def import_chunk(self, chunk):
+        now = timezone.now()
+        rows = [self.clean(row, now) for row in chunk]
+        rows = [row for row in rows if row is not None]
+        self.rejected += len(chunk) - len(rows)
+        self.resolve(rows)
+        comments = []
+        for news_id, author, text, created in rows:
+            author_id = self.author_ids.get(author)
+            if (
+                news_id not in self.news_ids or author_id is None
+                or not text.strip() or self.matcher.search(text)
+            ):
+                self.rejected += 1
+                continue
+            comments.append(Comment(
+                news_id=news_id,
+                author_id=author_id,
+                text=text,
+                created=created,
+            ))
+        with transaction.atomic():
+            comments_created(bulk_insert(Comment, comments))
+        return len(comments)
@@ -0,0 +1,112 @@
+import time
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from news.bulk_actions import ACTIONS, CHUNK_SIZE, count_matching, moderate
+from news.models import Comment
+
+User = get_user_model()
+
+
+def parse_moment(value):
+    """Дата или дата со временем; наивное время считается местным."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            date = parse_date(value)
+            if date is not None:
+                moment = datetime.combine(date, datetime.min.time())
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise CommandError(f'Не удалось разобрать дату: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет, скрывает или показывает комментарии по авторам, '
+        'времени создания и запрещённым словам. Комментарии меняются '
+        'пачками по id, каждая пачка — в своей транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=tuple(ACTIONS))
+        parser.add_argument(
+            '--author', action='append', default=[],
+            help='Имя автора; можно указать несколько раз.',
+        )
+        parser.add_argument(
+            '--since', help='Созданные не раньше этой даты или времени.'
+        )
+        parser.add_argument(
+            '--until', help='Созданные раньше этой даты или времени.'
+        )
+        parser.add_argument(
+            '--bad-words', action='store_true',
+            help='Только комментарии с запрещёнными словами.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько комментариев менять за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать комментарии и новости, ничего не менять.',
+        )
+
+    def handle(self, *args, **options):
+        if not (
+            options['author'] or options['since'] or options['until']
+            or options['bad_words']
+        ):
+            raise CommandError(
+                'Укажите --author, --since, --until или --bad-words.'
+            )
+        action = options['action']
+        queryset = self.get_queryset(options)
+        if options['dry_run']:
+            comments, news = count_matching(
+                action, queryset, options['bad_words'], options['chunk_size']
+            )
+            self.stdout.write(
+                f'Будет затронуто комментариев: {comments}, '
+                f'новостей: {news}.'
+            )
+            return
+        started = time.monotonic()
+        changed = 0
+        for count in moderate(
+            action, queryset, options['bad_words'], options['chunk_size']
+        ):
+            changed += count
+            self.stdout.write(f'Обработано комментариев: {changed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {changed} комментариев за '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
+
+    def get_queryset(self, options):
+        queryset = Comment.objects.all()
+        if options['author']:
+            author_ids = list(User.objects.filter(
+                username__in=options['author']
+            ).values_list('pk', flat=True))
+            if len(author_ids) < len(set(options['author'])):
+                raise CommandError('Не все авторы найдены.')
+            queryset = queryset.filter(author_id__in=author_ids)
+        if options['since']:
+            queryset = queryset.filter(
+                created__gte=parse_moment(options['since'])
+            )
+        if options['until']:
+            queryset = queryset.filter(
+                created__lt=parse_moment(options['until'])
+            )
+        return queryset
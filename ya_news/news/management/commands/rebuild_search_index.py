@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import Comment, News
+from news.search import COMMENT_INDEX, NEWS_INDEX
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает поисковый индекс новостей и комментариев '
+        'пачками по id, каждая пачка — в своей транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Сколько объектов индексировать за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        indexes = (
+            (News.objects.all(), NEWS_INDEX),
+            (Comment.objects.filter(is_hidden=False), COMMENT_INDEX),
+        )
+        for queryset, index in indexes:
+            index.clear()
+            last_id = 0
+            indexed = 0
+            while True:
+                objects = list(queryset.filter(pk__gt=last_id).order_by(
+                    'pk'
+                ).only('pk', *index.fields)[:chunk_size])
+                if not objects:
+                    break
+                with transaction.atomic():
+                    index.add(objects)
+                indexed += len(objects)
+                last_id = objects[-1].pk
+                self.stdout.write(f'{queryset.model.__name__}: {indexed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с.'
+        ))
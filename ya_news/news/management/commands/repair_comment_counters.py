@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.cache import HOME_VERSION_KEY, bump_version
+from news.counters import recount
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает comment_count и last_comment_at у новостей '
+        'пачками по id, каждая пачка — один UPDATE в своей транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько новостей пересчитывать за один UPDATE.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        last_id = 0
+        repaired = 0
+        while True:
+            ids = list(News.objects.filter(pk__gt=last_id).order_by(
+                'pk'
+            ).values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                repaired += recount(
+                    News.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+                )
+            last_id = ids[-1]
+            self.stdout.write(f'Пересчитано новостей: {repaired}')
+        bump_version(HOME_VERSION_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {repaired} новостей за '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
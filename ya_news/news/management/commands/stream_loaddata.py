@@ -0,0 +1,182 @@
+import io
+import json
+import os
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+
+from news.bulk import keep_dates
+from news.cache import HOME_VERSION_KEY, bump_version
+from news.models import Comment, News
+
+READ_SIZE = 64 * 1024
+# Объект длиннее этого числа символов считается ошибкой: иначе
+# незакрытая скобка заставила бы дочитать в память весь файл.
+MAX_OBJECT_SIZE = 16 * 1024 * 1024
+SKIPPED = ' \t\r\n,['
+
+
+def iter_objects(file, offset=0, max_size=MAX_OBJECT_SIZE):
+    """
+    Читает JSON-массив объектов по одному, не разбирая файл целиком.
+
+    Возвращает пары (объект, смещение в байтах сразу после него),
+    по смещению можно продолжить чтение после сбоя. Если объект
+    не закончился за max_size символов, бросает CommandError.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    while True:
+        start = position
+        while position < len(buffer) and buffer[position] in SKIPPED:
+            position += 1
+        offset += position - start
+        if position == len(buffer):
+            if eof:
+                return
+            buffer = file.read(READ_SIZE)
+            position = 0
+            eof = not buffer
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            if len(buffer) - position > max_size:
+                raise CommandError(
+                    f'Объект со смещения {offset} длиннее {max_size} '
+                    'символов, см. --max-object-size.'
+                )
+            more = file.read(READ_SIZE)
+            eof = not more
+            buffer = buffer[position:] + more
+            position = 0
+            continue
+        offset += len(buffer[position:end].encode())
+        position = end
+        yield obj, offset
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает фикстуру в формате JSON, как loaddata, но читает '
+        'файл потоком и пишет объекты пачками через bulk_create, '
+        'по модели на запрос. С --resume продолжает прерванную загрузку.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу фикстуры.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Сколько объектов записывать в одной транзакции.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с места, сохранённого в файле .progress.',
+        )
+        parser.add_argument(
+            '--max-object-size', type=int, default=MAX_OBJECT_SIZE,
+            help='Наибольшая длина одного объекта в символах.',
+        )
+        parser.add_argument(
+            '--ignorenonexistent', '-i', action='store_true',
+            help='Пропускать поля, которых нет в моделях.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        self.progress_path = path + '.progress'
+        self.offset = self.loaded = 0
+        if options['resume'] and os.path.exists(self.progress_path):
+            with open(self.progress_path) as file:
+                state = json.load(file)
+            self.offset, self.loaded = state['offset'], state['loaded']
+            self.stdout.write(f'Продолжаем с объекта {self.loaded}.')
+        self.models = set()
+        self.pending = {}
+        started = time.monotonic()
+        try:
+            file = open(path, 'rb')
+        except OSError as error:
+            raise CommandError(error)
+        with file:
+            file.seek(self.offset)
+            text = io.TextIOWrapper(file, encoding='utf-8')
+            try:
+                self.load(text, options)
+            except (ValueError, DeserializationError) as error:
+                raise CommandError(
+                    f'Ошибка после объекта {self.loaded}: {error}'
+                )
+        self.finish()
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {self.loaded} объектов за '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
+
+    def load(self, file, options):
+        count = 0
+        for obj, offset in iter_objects(
+            file, self.offset, options['max_object_size']
+        ):
+            for deserialized in Deserializer(
+                [obj], ignorenonexistent=options['ignorenonexistent']
+            ):
+                if deserialized.m2m_data:
+                    raise CommandError(
+                        'Связи many-to-many не поддерживаются, '
+                        'используйте loaddata.'
+                    )
+                instance = deserialized.object
+                self.pending.setdefault(type(instance), []).append(instance)
+            count += 1
+            if count == options['chunk_size']:
+                self.flush(offset, count)
+                count = 0
+        if count:
+            self.flush(offset, count)
+
+    def flush(self, offset, count):
+        """Пишет накопленные объекты одной транзакцией и сохраняет место."""
+        with transaction.atomic(), keep_dates(*self.pending):
+            for model, instances in self.pending.items():
+                model.objects.bulk_create(instances)
+        self.models.update(self.pending)
+        self.pending = {}
+        self.offset = offset
+        self.loaded += count
+        temporary = self.progress_path + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({'offset': self.offset, 'loaded': self.loaded}, file)
+        os.replace(temporary, self.progress_path)
+        self.stdout.write(f'Загружено объектов: {self.loaded}')
+
+    def finish(self):
+        """Делает то, что при loaddata сделали бы сигналы и сам loaddata."""
+        if not self.models:
+            return
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), self.models
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+        if self.models & {News, Comment}:
+            call_command('rebuild_search_index', stdout=self.stdout)
+        if Comment in self.models:
+            call_command('repair_comment_counters', stdout=self.stdout)
+        else:
+            bump_version(HOME_VERSION_KEY)
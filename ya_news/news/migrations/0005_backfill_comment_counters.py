@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+CHUNK_SIZE = 1000
+
+
+def backfill_comment_counters(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    comments = Comment.objects.filter(news=OuterRef('pk')).order_by()
+    count = Coalesce(Subquery(
+        comments.values('news').annotate(count=Count('id')).values('count')
+    ), 0)
+    last_comment_at = Subquery(
+        comments.order_by('-created').values('created')[:1]
+    )
+    last_id = 0
+    while True:
+        ids = list(News.objects.filter(pk__gt=last_id).order_by(
+            'pk'
+        ).values_list('pk', flat=True)[:CHUNK_SIZE])
+        if not ids:
+            break
+        News.objects.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(
+            comment_count=count, last_comment_at=last_comment_at
+        )
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_comment_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_comment_counters, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,75 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+CHUNK_SIZE = 1000
+
+# Таблицы и стемминг записаны здесь как есть, а не берутся
+# из news.search: миграция должна работать и после его изменений.
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+INDEXES = (
+    ('News', 'news_news_search', ('title', 'text')),
+    ('Comment', 'news_comment_search', ('text',)),
+)
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+
+
+def stem_text(text, stemmers):
+    return ' '.join(
+        stemmers[
+            'russian' if CYRILLIC_RE.search(word) else 'english'
+        ].stemWord(word)
+        for word in WORD_RE.findall(text.lower())
+    )
+
+
+def fill_search_index(apps, schema_editor):
+    stemmers = {
+        language: snowballstemmer.stemmer(language)
+        for language in ('russian', 'english')
+    }
+    for model_name, table, fields in INDEXES:
+        model = apps.get_model('news', model_name)
+        columns = ', '.join(('rowid',) + fields)
+        placeholders = ', '.join(['%s'] * (len(fields) + 1))
+        last_id = 0
+        while True:
+            rows = list(model.objects.filter(pk__gt=last_id).order_by(
+                'pk'
+            ).values_list('pk', *fields)[:CHUNK_SIZE])
+            if not rows:
+                break
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {table} ({columns}) '
+                    f'VALUES ({placeholders})',
+                    [
+                        [pk] + [stem_text(value, stemmers) for value in values]
+                        for pk, *values in rows
+                    ],
+                )
+            last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_backfill_comment_counters'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE VIRTUAL TABLE news_news_search '
+            f'USING fts5(title, text, {TOKENIZE})',
+            'DROP TABLE news_news_search',
+        ),
+        migrations.RunSQL(
+            'CREATE VIRTUAL TABLE news_comment_search '
+            f'USING fts5(text, {TOKENIZE})',
+            'DROP TABLE news_comment_search',
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
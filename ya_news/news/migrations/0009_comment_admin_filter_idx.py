@@ -0,0 +1,21 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_comment_delete_in_bulk'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created', 'id'], name='comment_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_hidden', True)), fields=['created', 'id'], name='comment_hidden_created_idx'),
+        ),
+    ]
@@ -8,9 +8,21 @@ class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    # Счётчики комментариев хранятся в новости, чтобы не считать
+    # комментарии на каждой странице; см. news/counters.py.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date',), name='news_date_idx'),
+            models.Index(
+                fields=('-last_comment_at',), name='news_last_comment_idx'
+            ),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -19,19 +31,47 @@ class News(models.Model):
 
 
 class Comment(models.Model):
+    # Комментарии новости и автора удаляются одним запросом в pre_delete,
+    # см. news/signals.py. С CASCADE Django из-за сигналов Comment
+    # загрузил бы каждый комментарий и удалял бы их по одному.
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.DO_NOTHING
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    # Скрытые комментарии не показываются и не входят в счётчики
+    # новости. Флаг меняется только пачками, см. news/bulk_actions.py.
+    is_hidden = models.BooleanField(default=False, editable=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+            models.Index(
+                fields=('author', 'id'),
+                name='comment_author_id_idx',
+            ),
+            # Порядок и фильтры списка комментариев в админке. Скрытых
+            # мало, поэтому для них частичный индекс: по условию
+            # is_hidden = True обычный индекс SQLite не использует.
+            models.Index(
+                fields=('created', 'id'),
+                name='comment_created_id_idx',
+            ),
+            models.Index(
+                fields=('created', 'id'),
+                condition=models.Q(is_hidden=True),
+                name='comment_hidden_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
@@ -0,0 +1,88 @@
+"""
+Проверка текста по списку запрещённых слов.
+
+Список разбирается один раз в множества целых слов и основ, поэтому
+проверка комментария стоит O(длина текста) и не зависит от размера
+списка. Запись вида ``слово`` ищется как целое слово, запись вида
+``основа*`` — как начало любого слова. Латинские буквы, похожие
+на кириллические, приводятся к кириллице и в списке, и в тексте.
+"""
+import os
+import re
+
+from django.conf import settings
+
+STEM_MARK = '*'
+WORD_RE = re.compile(r'\w+')
+LOOKALIKES = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к',
+    'm': 'м', 'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у',
+    'ё': 'е', '0': 'о', '3': 'з', '@': 'а',
+})
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и кириллическим двойникам."""
+    return text.lower().translate(LOOKALIKES)
+
+
+class BadWordsMatcher:
+    """Разобранный список запрещённых слов."""
+
+    def __init__(self, words):
+        self.words = set()
+        self.stems = set()
+        for word in words:
+            word = normalize(word.strip())
+            if not word:
+                continue
+            if word.endswith(STEM_MARK):
+                self.stems.add(word.rstrip(STEM_MARK))
+            else:
+                self.words.add(word)
+        self.max_stem_length = max(map(len, self.stems), default=0)
+
+    @classmethod
+    def from_file(cls, path):
+        """Читает список из файла: одна запись на строку."""
+        with open(path, encoding='utf-8') as file:
+            return cls(
+                line for line in file if not line.startswith('#')
+            )
+
+    def search(self, text):
+        """Возвращает первое найденное запрещённое слово или None."""
+        # '@' не входит в \w, поэтому двойники заменяются до разбиения.
+        for word in WORD_RE.findall(normalize(text)):
+            if word in self.words:
+                return word
+            for length in range(
+                    1, min(len(word), self.max_stem_length) + 1
+            ):
+                if word[:length] in self.stems:
+                    return word
+        return None
+
+
+_cache = {}
+
+
+def get_matcher(default_words=()):
+    """
+    Возвращает собранный matcher.
+
+    Если в настройках задан BAD_WORDS_FILE, список берётся из файла
+    и пересобирается, как только файл изменится, — без перезапуска.
+    Иначе используется переданный список по умолчанию.
+    """
+    path = getattr(settings, 'BAD_WORDS_FILE', None)
+    key = None if path is None else (path, os.stat(path).st_mtime_ns)
+    matcher = _cache.get(key)
+    if matcher is None:
+        if path is None:
+            matcher = BadWordsMatcher(default_words)
+        else:
+            matcher = BadWordsMatcher.from_file(path)
+        _cache.clear()
+        _cache[key] = matcher
+    return matcher
@@ -0,0 +1,61 @@
+"""
+Построители тестовых данных.
+
+Каждый построитель создаёт объекты одним bulk_create и делает то,
+что для них сделали бы сигналы: обновляет счётчики, поисковый индекс
+и кэш. Возвращаются объекты с pk в порядке создания.
+"""
+from datetime import timedelta as td
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone as tz
+
+from news.auth import forget_user
+from news.bulk import bulk_insert, comments_created, keep_dates, news_created
+from news.models import Comment, News
+
+User = get_user_model()
+
+
+def build_users(*usernames):
+    with transaction.atomic():
+        users = bulk_insert(User, [
+            User(username=username) for username in usernames
+        ])
+    for user in users:
+        forget_user(user.pk)
+    return users
+
+
+def build_news(count, title='Заголовок', text='Текст', start=None):
+    """Новости числом count, каждая на день старше предыдущей."""
+    start = start or tz.now()
+    with transaction.atomic():
+        news_list = bulk_insert(News, [
+            News(
+                title=f'{title} {index}',
+                text=f'{text} {index}',
+                date=start - td(days=index),
+            )
+            for index in range(count)
+        ])
+        news_created(news_list)
+    return news_list
+
+
+def build_comments(news, author, count, text='Текст', start=None):
+    """Комментарии числом count, каждый на день новее предыдущего."""
+    start = start or tz.now()
+    with transaction.atomic(), keep_dates(Comment):
+        comments = bulk_insert(Comment, [
+            Comment(
+                news=news,
+                author=author,
+                text=f'{text} {index}',
+                created=start + td(days=index),
+            )
+            for index in range(count)
+        ])
+        comments_created(comments)
+    return comments
@@ -1,25 +1,101 @@
+from copy import deepcopy
 from datetime import timedelta as td
 
 from django.urls import reverse
 from django.utils import timezone as tz
 from django.conf import settings
-from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.test import Client
 import pytest
 
-from news.models import News, Comment
-
-User = get_user_model()
-
-
-@pytest.fixture
-def author():
-    return User.objects.create(username='Автор')
-
-
-@pytest.fixture
-def reader():
-    return User.objects.create(username='Читатель')
+from news.models import Comment
+from news.pytest_tests.builders import (
+    build_comments, build_news, build_users
+)
+from yanews.testing import pytest_runtest_call  # noqa: F401
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш фрагментов не должен переживать откат БД между тестами,
+    а счётчики лимитов запросов — копиться от теста к тесту.
+    """
+    for backend in caches.all():
+        backend.clear()
+
+
+@pytest.fixture(params=('locmem', 'filebased'))
+def cache_backend(request, settings, tmp_path):
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    settings.CACHES = {**settings.CACHES, 'default': backends[request.param]}
+    return request.param
+
+
+@pytest.fixture
+def query_plans():
+    """Планы SQLite для всех SELECT-запросов, выполненных по адресу."""
+    if connection.vendor != 'sqlite':
+        pytest.skip('EXPLAIN QUERY PLAN есть только в SQLite.')
+
+    def explain(client, url):
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans[query['sql']] = [row[-1] for row in cursor.fetchall()]
+        return plans
+    return explain
+
+
+@pytest.fixture(scope='module')
+def module_data(django_db_setup, django_db_blocker):
+    """
+    Пользователи и новость, общие для всех тестов модуля.
+
+    Как setUpTestData в TestCase: данные создаются один раз в транзакции
+    на весь модуль, каждый тест с django_db работает в точке сохранения
+    внутри неё и откатывается к ней, а в конце модуля откатывается всё.
+    Модуль подключает фикстуру через pytestmark, чтобы данные появлялись
+    до первого теста, а не внутри него через lazy_fixture. В модулях
+    с transaction=True её использовать нельзя.
+    """
+    with django_db_blocker.unblock():
+        atomic = transaction.atomic()
+        atomic.__enter__()
+        author, reader = build_users('Автор', 'Читатель')
+        news, = build_news(1, title='Тестовая новость', text='Текст новости')
+    yield {
+        'author': author,
+        'reader': reader,
+        'news': news,
+    }
+    with django_db_blocker.unblock():
+        transaction.set_rollback(True)
+        atomic.__exit__(None, None, None)
+
+
+@pytest.fixture
+def author(module_data, db):
+    return deepcopy(module_data['author'])
+
+
+@pytest.fixture
+def reader(module_data, db):
+    return deepcopy(module_data['reader'])
 
 
 @pytest.fixture
@@ -36,24 +112,20 @@ def reader_client(reader):
 
 
 @pytest.fixture
-def news(author):
-    return News.objects.create(
-        title='Тестовая новость',
-        text='Текст новости',
-    )
+def anonymous_client():
+    return Client()
+
+
+@pytest.fixture
+def news(module_data, db):
+    return deepcopy(module_data['news'])
 
 
 @pytest.fixture
-def create_news(author):
-    today = tz.now()
-    News.objects.bulk_create([
-        News(
-            title=f'Заголовок {index}',
-            text=f'Текст {index}',
-            date=today - td(days=index)
-        )
-        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
-    ])
+def create_news(db):
+    return build_news(
+        settings.NEWS_COUNT_ON_HOME_PAGE + 1, start=tz.now() - td(days=1)
+    )
 
 
 @pytest.fixture
@@ -67,14 +139,7 @@ def comment(author, news):
 
 @pytest.fixture
 def create_comments(author, news):
-    now = tz.now()
-    for index in range(5):
-        Comment.objects.create(
-            news=news,
-            author=author,
-            text=f'Текст {index}',
-            created=now + td(days=index)
-        )
+    return build_comments(news, author, 5)
 
 
 @pytest.fixture
@@ -95,6 +160,16 @@ def detail_url(news):
     return reverse('news:detail', args=(news.id,))
 
 
+@pytest.fixture
+def comments_url(news):
+    return reverse('news:comments', args=(news.id,))
+
+
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
+
+
 @pytest.fixture
 def delete_url(comment):
     return reverse('news:delete', args=(comment.id,))
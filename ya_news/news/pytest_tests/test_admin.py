@@ -0,0 +1,188 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+import pytest
+
+from news.admin import LATEST_COMMENTS, EstimatedCountPaginator
+from news.auth import forget_user
+from news.models import Comment, News
+from news.pytest_tests.builders import build_comments
+
+User = get_user_model()
+
+pytestmark = pytest.mark.usefixtures('module_data')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('comments_count', (1, 50))
+def test_admin_queries_do_not_depend_on_comments(
+    admin_client, admin_user, news, author, comments_count,
+    django_assert_num_queries,
+):
+    """Проверка, списки и страницы изменения в админке выполняют
+    одно и то же число запросов при любом количестве комментариев.
+    """
+    comment, *_ = build_comments(news, author, comments_count)
+    pages = (
+        (reverse('admin:news_news_changelist'), 6),
+        (reverse('admin:news_news_change', args=(news.pk,)), 7),
+        (reverse('admin:news_comment_changelist'), 4),
+        (reverse('admin:news_comment_change', args=(comment.pk,)), 8),
+    )
+    for url, queries in pages:
+        ContentType.objects.clear_cache()
+        forget_user(admin_user.pk)
+        with django_assert_num_queries(queries):
+            admin_client.get(url)
+
+
+@pytest.mark.django_db
+def test_news_change_shows_latest_comments(admin_client, news, author):
+    """Проверка, на странице новости только последние комментарии,
+    а правки и удаление из них сохраняются.
+    """
+    comments = build_comments(news, author, LATEST_COMMENTS + 5)
+    url = reverse('admin:news_news_change', args=(news.pk,))
+    response = admin_client.get(url)
+    forms = response.context['inline_admin_formsets'][0].formset.forms
+    assert [form.instance for form in forms] == comments[:4:-1]
+    data = {
+        'title': news.title,
+        'text': news.text,
+        'date': news.date.isoformat(),
+        'comment_set-TOTAL_FORMS': len(forms),
+        'comment_set-INITIAL_FORMS': len(forms),
+        'comment_set-1-DELETE': 'on',
+    }
+    for index, form in enumerate(forms):
+        data[f'comment_set-{index}-id'] = form.instance.pk
+        data[f'comment_set-{index}-news'] = news.pk
+        data[f'comment_set-{index}-text'] = form.instance.text
+    data['comment_set-0-text'] = 'Исправленный текст'
+    admin_client.post(url, data)
+    assert Comment.objects.get(pk=comments[-1].pk).text == 'Исправленный текст'
+    assert not Comment.objects.filter(pk=comments[-2].pk).exists()
+    news.refresh_from_db()
+    assert news.comment_count == len(comments) - 1
+
+
+@pytest.mark.django_db
+def test_news_change_saves_after_new_comment(admin_client, news, author):
+    """Проверка, комментарий, добавленный после открытия страницы
+    новости, не мешает сохранить формы последних комментариев.
+    """
+    build_comments(news, author, LATEST_COMMENTS)
+    url = reverse('admin:news_news_change', args=(news.pk,))
+    forms = admin_client.get(
+        url
+    ).context['inline_admin_formsets'][0].formset.forms
+    build_comments(news, author, 1)
+    data = {
+        'title': news.title,
+        'text': news.text,
+        'date': news.date.isoformat(),
+        'comment_set-TOTAL_FORMS': len(forms),
+        'comment_set-INITIAL_FORMS': len(forms),
+    }
+    for index, form in enumerate(forms):
+        data[f'comment_set-{index}-id'] = form.instance.pk
+        data[f'comment_set-{index}-news'] = news.pk
+        data[f'comment_set-{index}-text'] = form.instance.text
+    oldest = forms[-1].instance
+    data[f'comment_set-{len(forms) - 1}-text'] = 'Исправленный текст'
+    response = admin_client.post(url, data)
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.get(pk=oldest.pk).text == 'Исправленный текст'
+
+
+@pytest.mark.django_db
+# Действие выполняет постоянное число запросов на пачку, здесь пачка одна.
+@pytest.mark.query_budget('admin:news_comment_changelist', 11)
+def test_comment_moderation_actions(admin_client, news, author, reader):
+    """Проверка, действия админки скрывают выбранные комментарии
+    и после подтверждения удаляют все комментарии их авторов.
+    """
+    spam = build_comments(news, author, 3, text='Спам')
+    kept = build_comments(news, reader, 1, text='Отзыв')
+    url = reverse('admin:news_comment_changelist')
+    admin_client.post(url, {
+        'action': 'hide_comments', '_selected_action': [spam[0].pk],
+    })
+    news.refresh_from_db()
+    assert news.comment_count == 3
+    data = {
+        'action': 'delete_authors_comments',
+        '_selected_action': [spam[0].pk],
+    }
+    response = admin_client.post(url, data)
+    assert response.context['comments_count'] == 3
+    assert Comment.objects.count() == 4
+    admin_client.post(url, {**data, 'post': 'yes'})
+    assert list(Comment.objects.all()) == kept
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+# Не суперпользователю права загружаются из базы: ещё два запроса.
+@pytest.mark.query_budget('admin:news_comment_changelist', 6)
+@pytest.mark.parametrize(
+    'action', ('delete_comments', 'hide_comments', 'delete_authors_comments')
+)
+def test_view_only_staff_cannot_moderate(client, news, author, action):
+    """Проверка, сотрудник с правом только на просмотр не видит
+    действий модерации и не может их выполнить.
+    """
+    staff = User.objects.create_user('staff', is_staff=True)
+    staff.user_permissions.add(Permission.objects.get(
+        codename='view_comment', content_type__app_label='news'
+    ))
+    client.force_login(staff)
+    comments = build_comments(news, author, 2)
+    url = reverse('admin:news_comment_changelist')
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.context['action_form'] is None
+    client.post(url, {
+        'action': action, '_selected_action': [comments[0].pk],
+        'post': 'yes',
+    })
+    assert list(Comment.objects.filter(is_hidden=False)) == comments
+
+
+@pytest.mark.django_db
+# Сохранение: UPDATE, индекс, журнал админки и точки сохранения.
+@pytest.mark.query_budget('admin:news_comment_change', 11)
+def test_comment_news_not_changed(
+    admin_client, news, create_news, comment
+):
+    """Проверка, в админке комментарий нельзя перенести в другую
+    новость: счётчики обеих новостей остаются верными.
+    """
+    other = News.objects.exclude(pk=news.pk).first()
+    url = reverse('admin:news_comment_change', args=(comment.pk,))
+    admin_client.post(url, {
+        'author': comment.author_id, 'news': other.pk, 'text': 'Перенос',
+    })
+    comment.refresh_from_db()
+    assert comment.text == 'Перенос'
+    assert comment.news_id == news.pk
+    news.refresh_from_db()
+    other.refresh_from_db()
+    assert (news.comment_count, other.comment_count) == (1, 0)
+
+
+@pytest.mark.django_db
+def test_estimated_count_paginator(create_news):
+    """Проверка, больше предела строки без фильтров оцениваются по pk,
+    а с фильтрами считаются только до предела.
+    """
+    paginator = EstimatedCountPaginator(News.objects.all(), 5)
+    paginator.exact_count_limit = 10
+    assert paginator.count == News.objects.count()
+    paginator = EstimatedCountPaginator(News.objects.filter(pk__gt=0), 5)
+    paginator.exact_count_limit = 10
+    assert paginator.count == 11
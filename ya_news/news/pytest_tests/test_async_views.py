@@ -0,0 +1,26 @@
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncRequestFactory
+import pytest
+
+from news.async_views import read_async
+from news.pytest_tests.builders import (
+    build_comments, build_news, build_users
+)
+from news.views import NewsDetailView
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_read_view():
+    """Проверка, асинхронная страница новости отдаётся из пула потоков."""
+    author, = build_users('Автор')
+    news, = build_news(1)
+    comment, = build_comments(news, author, 1)
+    view = read_async(NewsDetailView.as_view())
+    request = AsyncRequestFactory().get(f'/news/{news.pk}/')
+    request.user = AnonymousUser()
+    response = async_to_sync(view)(request, pk=news.pk)
+    assert response.status_code == HTTPStatus.OK
+    assert comment.text in response.content.decode()
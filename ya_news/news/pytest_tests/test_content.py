@@ -1,7 +1,12 @@
+from http import HTTPStatus
+
 from django.conf import settings
 import pytest
 
 from news.forms import CommentForm
+from news.models import Comment, News
+
+pytestmark = pytest.mark.usefixtures('module_data')
 
 
 @pytest.mark.django_db
@@ -25,6 +30,37 @@ def test_news_order(client, create_news, home_url):
     assert dates == sorted(dates, reverse=True)
 
 
+@pytest.mark.django_db
+def test_news_comment_count(client, news, create_comments, home_url):
+    """Проверка, на главной странице число комментариев
+    берётся из счётчика новости, а не из загруженных комментариев.
+    """
+    response = client.get(home_url)
+    object_list = response.context['object_list']
+    assert object_list[0].comment_count == news.comment_set.count()
+    assert 'comment_set' not in getattr(
+        object_list[0], '_prefetched_objects_cache', {}
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('comments_count', (0, 1, 50))
+def test_home_queries_do_not_depend_on_comments(
+    client, author, create_news, home_url, comments_count,
+    django_assert_num_queries
+):
+    """Проверка, главная страница выполняет один запрос
+    при любом количестве комментариев.
+    """
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for news in News.objects.all()
+        for index in range(comments_count)
+    )
+    with django_assert_num_queries(1):
+        client.get(home_url)
+
+
 @pytest.mark.django_db
 def test_comments_order(client, news, create_comments, detail_url):
     """Проверка, комментарии к новостям отображаются по дате создания."""
@@ -36,6 +72,57 @@ def test_comments_order(client, news, create_comments, detail_url):
     assert dates == sorted(dates)
 
 
+@pytest.mark.django_db
+def test_comments_paginated(
+    client, news, create_comments, detail_url, comments_url, settings
+):
+    """Проверка, комментарии выдаются страницами без пропусков и повторов."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    response = client.get(detail_url)
+    pages = [response.context['comment_page'].comments]
+    next_cursor = response.context['comment_page'].next_cursor
+    while next_cursor is not None:
+        response = client.get(comments_url, {'after': next_cursor})
+        pages.append(response.context['comment_page'].comments)
+        next_cursor = response.context['comment_page'].next_cursor
+    assert [len(page) for page in pages] == [2, 2, 1]
+    shown = [comment.pk for page in pages for comment in page]
+    assert shown == list(news.comment_set.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('remove', ('delete', 'hide'))
+def test_comments_page_after_removed_cursor(
+    client, news, create_comments, detail_url, comments_url, settings,
+    remove
+):
+    """Проверка, после удаления или скрытия последнего показанного
+    комментария следующая страница не пустая.
+    """
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    response = client.get(detail_url)
+    next_cursor = response.context['comment_page'].next_cursor
+    cursor = Comment.objects.filter(pk=next_cursor)
+    if remove == 'delete':
+        cursor.delete()
+    else:
+        cursor.update(is_hidden=True)
+    response = client.get(comments_url, {'after': next_cursor})
+    assert response.context['comment_page'].comments == create_comments[2:4]
+
+
+@pytest.mark.django_db
+def test_comments_page_queries(
+    client, news, create_comments, comments_url, settings,
+    django_assert_num_queries
+):
+    """Проверка, страница комментариев загружается одним запросом."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    first = news.comment_set.first()
+    with django_assert_num_queries(1):
+        client.get(comments_url, {'after': first.pk})
+
+
 @pytest.mark.django_db
 def test_anonymous_has_no_form(client, news, detail_url):
     """Проверка, у анонимного пользователя нет формы
@@ -53,3 +140,129 @@ def test_authorized_has_form(author_client, news, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+def test_cached_pages_skip_queries(
+    anonymous_client, cache_backend, news, create_comments, home_url,
+    detail_url, django_assert_num_queries
+):
+    """Проверка, повторный анонимный запрос берёт фрагменты из кэша."""
+    anonymous_client.get(home_url)
+    anonymous_client.get(detail_url)
+    with django_assert_num_queries(0):
+        anonymous_client.get(home_url)
+    with django_assert_num_queries(1):
+        anonymous_client.get(detail_url)
+
+
+@pytest.mark.django_db
+def test_cached_comments_keep_author_links(
+    anonymous_client, author_client, reader_client, cache_backend, comment,
+    detail_url, edit_url
+):
+    """Проверка, ссылки на правку комментария не попадают в кэш."""
+    for client, visible in (
+        (anonymous_client, False),
+        (author_client, True),
+        (reader_client, False),
+    ):
+        content = client.get(detail_url).content.decode()
+        assert (edit_url in content) is visible
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url',
+    [
+        pytest.lazy_fixture('home_url'),
+        pytest.lazy_fixture('detail_url'),
+    ]
+)
+def test_unchanged_page_not_modified(
+    anonymous_client, news, comment, url, django_assert_max_num_queries
+):
+    """Проверка, неизменённая страница отдаётся как 304 без рендеринга."""
+    etag = anonymous_client.get(url)['ETag']
+    with django_assert_max_num_queries(1):
+        response = anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.templates
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url',
+    [
+        pytest.lazy_fixture('home_url'),
+        pytest.lazy_fixture('detail_url'),
+    ]
+)
+def test_new_comment_changes_etag(
+    anonymous_client, author, news, url, django_capture_on_commit_callbacks
+):
+    """Проверка, новый комментарий меняет ETag страницы."""
+    etag = anonymous_client.get(url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Новый')
+    response = anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_etag_differs_per_user(anonymous_client, author_client, detail_url):
+    """Проверка, анониму и автору не отдаётся один и тот же ETag."""
+    assert (
+        anonymous_client.get(detail_url)['ETag']
+        != author_client.get(detail_url)['ETag']
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url',
+    [
+        pytest.lazy_fixture('home_url'),
+        pytest.lazy_fixture('detail_url'),
+    ]
+)
+def test_new_csrf_cookie_changes_etag(author_client, url):
+    """Проверка, после смены CSRF-cookie вошедший пользователь
+    получает страницу заново, а не 304 со старым токеном в формах.
+    """
+    # Первый ответ страницы с формой выставляет CSRF-cookie.
+    author_client.get(url)
+    etag = author_client.get(url)['ETag']
+    assert author_client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    author_client.cookies[settings.CSRF_COOKIE_NAME] = 'new-token'
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_search_ranks_news_and_finds_comments(
+    client, author, news, comment, search_url
+):
+    """Проверка, поиск находит словоформы и выше ставит заголовки."""
+    in_text = News.objects.create(title='Погода', text='Новости дня')
+    response = client.get(search_url, {'q': 'новостями'})
+    assert list(response.context['object_list']) == [news, in_text]
+    response = client.get(search_url, {'q': 'комментарии'})
+    assert list(response.context['comments']) == [comment]
+    response = client.get(search_url, {'q': '"OR*'})
+    assert list(response.context['object_list']) == []
+
+
+@pytest.mark.django_db
+def test_search_ranks_only_newest_candidates(client, settings, search_url):
+    """Проверка, ранжируются только последние SEARCH_CANDIDATES совпадений."""
+    settings.SEARCH_CANDIDATES = 2
+    News.objects.create(title='Погода', text='Погода')
+    newer = News.objects.create(title='Город', text='Погода')
+    newest = News.objects.create(title='Парк', text='Погода')
+    response = client.get(search_url, {'q': 'погода'})
+    assert set(response.context['object_list']) == {newer, newest}
@@ -0,0 +1,59 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+import pytest
+
+from yanews.instrumentation import recording, summarize
+
+pytestmark = pytest.mark.usefixtures('module_data')
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, news, detail_url):
+    """Проверка, ответ содержит замеры в заголовке Server-Timing."""
+    response = client.get(detail_url)
+    timing = response['Server-Timing']
+    for metric in ('db;dur=', 'tpl;dur=', 'total;dur='):
+        assert metric in timing
+
+
+@pytest.mark.django_db
+def test_requests_recorded_by_view_name(
+    client, news, create_comments, home_url, detail_url
+):
+    """Проверка, запросы записываются с именем URL и числом запросов."""
+    with recording() as records:
+        client.get(home_url)
+        client.get(detail_url)
+    assert [record.view_name for record in records] == [
+        'news:home', 'news:detail'
+    ]
+    home, detail = records
+    assert home.queries == 1
+    assert detail.queries == 2
+    assert detail.duplicates == 0
+    assert detail.template_ms > 0
+    summary = summarize(records)
+    assert summary['news:detail']['requests'] == 1
+    assert summary['news:detail']['queries_max'] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.query_budget('news:home', 1)
+def test_anonymous_home_budget(client, create_news, home_url):
+    """Проверка, главная страница для анонима укладывается в один запрос."""
+    client.get(home_url)
+
+
+@pytest.mark.django_db
+def test_viewstats_command(news, home_url, detail_url):
+    """Проверка, команда выводит сводку по именам URL."""
+    out = StringIO()
+    call_command(
+        'viewstats', home_url, detail_url, '--repeat', '2', '--json',
+        stdout=out,
+    )
+    summary = json.loads(out.getvalue())
+    assert summary['news:home']['requests'] == 2
+    assert summary['news:detail']['requests'] == 2
@@ -1,10 +1,32 @@
+import csv
+import json
+import os
+from datetime import timedelta as td
 from http import HTTPStatus
+from io import StringIO
 
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone as tz
 from pytest_django.asserts import assertFormError, assertRedirects
 import pytest
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.cache import get_news_version
+from news.forms import WARNING, CommentForm
+from news.models import Comment, News
+from news.pytest_tests.builders import build_comments
+from news.search import COMMENT_INDEX
+from news.signals import configure_sqlite
+from yanews.ratelimit import RateLimitMiddleware
+
+pytestmark = pytest.mark.usefixtures('module_data')
+
+BAD_WORD = 'редиска'
 
 
 @pytest.mark.django_db
@@ -34,13 +56,50 @@ def test_user_can_create_comment(
 @pytest.mark.django_db
 def test_user_cant_use_bad_words(author_client, news, detail_url):
     """Проверка, пользователь не может использовать запрещенные слова."""
-    bad_words_data = {'text': f'Какой-то текст, {BAD_WORDS[0]}, еще текст'}
+    bad_words_data = {'text': f'Какой-то текст, {BAD_WORD}, еще текст'}
     response = author_client.post(detail_url, data=bad_words_data)
     assertFormError(response, 'form', 'text', WARNING)
     comments_count = Comment.objects.count()
     assert comments_count == 0
 
 
+@pytest.mark.parametrize(
+    'text, is_valid',
+    (
+        ('Ты РЕДИСКА!', False),
+        ('Ты pедиcкa!', False),
+        ('Негодяй, негодяй', False),
+        ('Редиски на грядке', False),
+        ('Не будь редиской', False),
+        ('ты негодяйка', False),
+        ('негодяйский поступок', False),
+        ('Держи негодяя!', False),
+        ('Справимся с негодяем', False),
+        ('Обычный комментарий', True),
+        ('Продаю редис', True),
+    )
+)
+def test_bad_words_matching(text, is_valid):
+    """Проверка, запрещены все формы слов из списка и их двойники,
+    но не слова, которые лишь начинаются похоже.
+    """
+    assert CommentForm(data={'text': text}).is_valid() is is_valid
+
+
+def test_bad_words_file_reload(settings, tmp_path):
+    """Проверка, список из файла перечитывается после изменения."""
+    path = tmp_path / 'bad_words.txt'
+    path.write_text('# Основы\nредиск*\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(path)
+    assert not CommentForm(data={'text': 'Редиски на грядке'}).is_valid()
+    assert CommentForm(data={'text': 'Какой негодяй'}).is_valid()
+    path.write_text('негодяй\n', encoding='utf-8')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert not CommentForm(data={'text': 'Какой негодяй'}).is_valid()
+    assert CommentForm(data={'text': 'Редиски на грядке'}).is_valid()
+
+
 @pytest.mark.django_db
 def test_user_cant_delete_comment_of_another_user(
     reader_client, comment, delete_url
@@ -87,3 +146,498 @@ def test_user_cant_edit_comment_of_anothers(
     assert updated_comment.news == original_comment.news
     assert updated_comment.author == original_comment.author
     assert updated_comment.text == original_comment.text
+
+
+@pytest.mark.django_db
+def test_new_comment_resets_cache(
+    anonymous_client, author_client, cache_backend, form_data, news,
+    home_url, detail_url, django_capture_on_commit_callbacks
+):
+    """Проверка, новый комментарий сразу виден на закэшированных страницах."""
+    anonymous_client.get(home_url)
+    anonymous_client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, data=form_data)
+    content = anonymous_client.get(detail_url).content.decode()
+    assert form_data['text'] in content
+    content = anonymous_client.get(home_url).content.decode()
+    assert 'Комментариев: 1' in content
+
+
+@pytest.mark.django_db
+def test_edited_comment_resets_cache(
+    anonymous_client, author_client, cache_backend, comment, form_data,
+    detail_url, edit_url, django_capture_on_commit_callbacks
+):
+    """Проверка, правка комментария сбрасывает кэш новости."""
+    anonymous_client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(edit_url, data=form_data)
+    content = anonymous_client.get(detail_url).content.decode()
+    assert form_data['text'] in content
+    assert comment.text not in content
+
+
+@pytest.mark.django_db
+def test_deleted_comment_resets_cache(
+    anonymous_client, author_client, cache_backend, comment, home_url,
+    detail_url, delete_url, django_capture_on_commit_callbacks
+):
+    """Проверка, удаление комментария сбрасывает кэш новости."""
+    anonymous_client.get(home_url)
+    anonymous_client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(delete_url)
+    content = anonymous_client.get(detail_url).content.decode()
+    assert comment.text not in content
+    content = anonymous_client.get(home_url).content.decode()
+    assert 'Комментариев' not in content
+
+
+@pytest.mark.django_db
+def test_version_bumped_after_commit(
+    author, news, django_capture_on_commit_callbacks
+):
+    """Проверка, версия новости растёт только после фиксации
+    транзакции, в которой изменился комментарий.
+    """
+    version = get_news_version(news.pk)
+    with django_capture_on_commit_callbacks() as callbacks:
+        Comment.objects.create(news=news, author=author, text='Новый')
+    assert get_news_version(news.pk) == version
+    for callback in callbacks:
+        callback()
+    assert get_news_version(news.pk) > version
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('comments_count', (1, 100))
+def test_news_delete_queries(
+    news, author, comments_count, django_assert_num_queries
+):
+    """Проверка, удаление новости не зависит от числа комментариев.
+
+    Строки комментариев в индексе, комментарии, новость и её строка
+    в индексе: по одному запросу.
+    """
+    build_comments(news, author, comments_count)
+    with django_assert_num_queries(4):
+        news.delete()
+    assert not Comment.objects.exists()
+    assert COMMENT_INDEX.ids('комментарий') == []
+
+
+@pytest.mark.django_db
+def test_author_delete_recounts(
+    client, author, reader, news, create_news, search_url
+):
+    """Проверка, при удалении пользователя его комментарии удаляются
+    пачкой, а счётчики новостей пересчитываются.
+    """
+    other = News.objects.exclude(pk=news.pk).first()
+    build_comments(news, author, 2, text='Автор')
+    build_comments(other, author, 1, text='Автор')
+    kept = build_comments(news, reader, 1, text='Читатель')
+    author.delete()
+    assert list(Comment.objects.all()) == kept
+    news.refresh_from_db()
+    other.refresh_from_db()
+    assert (news.comment_count, other.comment_count) == (1, 0)
+    assert other.last_comment_at is None
+    response = client.get(search_url, {'q': 'автор'})
+    assert list(response.context['comments']) == []
+
+
+@pytest.mark.django_db
+def test_create_comment_queries(
+    author_client, form_data, news, detail_url, django_assert_num_queries
+):
+    """Проверка числа запросов при создании комментария.
+
+    Сессия, пользователь, новость, вставка комментария, обновление
+    счётчиков новости и поискового индекса в одной точке сохранения.
+    """
+    with django_assert_num_queries(8):
+        author_client.post(detail_url, data=form_data)
+
+
+@pytest.mark.django_db
+def test_edit_comment_queries(
+    author_client, comment, form_data, edit_url, django_assert_num_queries
+):
+    """Проверка числа запросов при редактировании комментария.
+
+    Сессия, пользователь, комментарий, его обновление и обновление
+    поискового индекса.
+    """
+    with django_assert_num_queries(5):
+        author_client.post(edit_url, data=form_data)
+
+
+@pytest.mark.django_db
+def test_delete_comment_queries(
+    author_client, comment, delete_url, django_assert_num_queries
+):
+    """Проверка числа запросов при удалении комментария.
+
+    Сессия, пользователь, комментарий, его удаление, обновление
+    счётчиков новости и удаление из поискового индекса.
+    """
+    with django_assert_num_queries(6):
+        author_client.post(delete_url)
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied(settings):
+    """Проверка, PRAGMA из настроек применяются к соединению."""
+    if connection.vendor != 'sqlite':
+        pytest.skip('PRAGMA есть только в SQLite.')
+    settings.SQLITE_PRAGMAS = {'cache_size': -4096}
+    configure_sqlite(sender=None, connection=connection)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        assert cursor.fetchone()[0] == -4096
+
+
+@pytest.mark.django_db
+def test_user_loaded_from_cache(author_client, author, home_url):
+    """Проверка, пользователь берётся из кэша, пока его не изменят."""
+    author_client.get(home_url)
+    with CaptureQueriesContext(connection) as context:
+        response = author_client.get(home_url)
+    assert response.context['user'] == author
+    assert not [
+        query for query in context.captured_queries
+        if 'FROM "auth_user"' in query['sql']
+    ]
+    author.is_active = False
+    author.save()
+    response = author_client.get(home_url)
+    assert response.context['user'].is_anonymous
+
+
+@pytest.mark.django_db
+def test_model_backend_session_kept(client, author, home_url):
+    """Проверка, сессия, открытая через ModelBackend, не теряется."""
+    client.force_login(
+        author, backend='django.contrib.auth.backends.ModelBackend'
+    )
+    response = client.get(home_url)
+    assert response.context['user'] == author
+
+
+def test_password_hash_iterations(settings):
+    """Проверка, PBKDF2 берёт число итераций из настроек."""
+    settings.PASSWORD_HASHERS = settings.PASSWORD_HASHER_PROFILES['default']
+    settings.PASSWORD_HASH_ITERATIONS = 1000
+    encoded = make_password('пароль')
+    assert encoded.startswith('pbkdf2_sha256$1000$')
+    assert check_password('пароль', encoded)
+
+
+@pytest.mark.django_db
+def test_signed_cookie_sessions(settings, client, author, detail_url):
+    """Проверка, с сессиями в cookie таблица сессий не читается."""
+    settings.SESSION_ENGINE = settings.SESSION_ENGINES['signed_cookies']
+    client.force_login(author)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(detail_url)
+    assert response.context['user'] == author
+    assert not [
+        query for query in context.captured_queries
+        if 'django_session' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+def test_purge_sessions():
+    """Проверка, команда удаляет пачками только истёкшие сессии."""
+    now = tz.now()
+    Session.objects.bulk_create([
+        Session(
+            session_key=f'expired{index}', session_data='',
+            expire_date=now - td(days=1),
+        )
+        for index in range(5)
+    ] + [
+        Session(session_key='active', session_data='',
+                expire_date=now + td(days=1)),
+    ])
+    call_command('purge_sessions', '--chunk-size', '2', stdout=StringIO())
+    assert list(
+        Session.objects.values_list('session_key', flat=True)
+    ) == ['active']
+
+
+@pytest.mark.django_db
+def test_comment_rate_limit(settings, author_client, form_data, detail_url):
+    """Проверка, сверх лимита комментарии не создаются, а ответ — 429."""
+    settings.RATE_LIMITS = {'news:detail': (2, 3600)}
+    for _ in range(2):
+        response = author_client.post(detail_url, data=form_data)
+        assert response.status_code == HTTPStatus.FOUND
+    response = author_client.post(detail_url, data=form_data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert 0 < int(response['Retry-After']) <= 3600
+    assert Comment.objects.count() == 2
+    assert author_client.get(detail_url).status_code == HTTPStatus.OK
+
+
+def test_rate_limit_needs_atomic_cache(settings, tmp_path):
+    """Проверка, счётчики лимитов нельзя хранить в FileBasedCache."""
+    settings.CACHES = {**settings.CACHES, settings.RATE_LIMIT_CACHE: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path),
+    }}
+    with pytest.raises(ImproperlyConfigured):
+        RateLimitMiddleware(lambda request: None)
+
+
+@pytest.mark.django_db
+def test_search_index_follows_writes(
+    author_client, comment, form_data, edit_url, delete_url, search_url
+):
+    """Проверка, поиск видит изменённый текст и не видит удалённый."""
+    author_client.post(edit_url, data=form_data)
+    response = author_client.get(search_url, {'q': form_data['text']})
+    assert list(response.context['comments']) == [comment]
+    author_client.post(delete_url)
+    response = author_client.get(search_url, {'q': form_data['text']})
+    assert list(response.context['comments']) == []
+
+
+@pytest.mark.django_db
+def test_comment_counters_follow_writes(
+    author_client, form_data, news, detail_url
+):
+    """Проверка, счётчики новости меняются при создании и удалении."""
+    author_client.post(detail_url, data=form_data)
+    author_client.post(detail_url, data=form_data)
+    news.refresh_from_db()
+    first, last = Comment.objects.all()
+    assert news.comment_count == 2
+    assert news.last_comment_at == last.created
+    author_client.post(reverse('news:delete', args=(last.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_comment_at == first.created
+    author_client.post(reverse('news:delete', args=(first.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    assert news.last_comment_at is None
+
+
+@pytest.mark.django_db
+def test_repair_comment_counters(news, create_comments):
+    """Проверка, команда восстанавливает сбитые счётчики."""
+    News.objects.update(comment_count=100, last_comment_at=None)
+    call_command(
+        'repair_comment_counters', '--chunk-size', '1', stdout=StringIO()
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 5
+    assert news.last_comment_at == news.comment_set.last().created
+
+
+@pytest.mark.django_db
+def test_moderate_comments_by_author(client, news, author, reader):
+    """Проверка, команда удаляет комментарии автора, а dry-run
+    только считает их.
+    """
+    build_comments(news, author, 3, text='Спам')
+    kept = build_comments(news, reader, 2, text='Отзыв')
+    stdout = StringIO()
+    call_command(
+        'moderate_comments', 'delete', '--author', author.username,
+        '--dry-run', stdout=stdout,
+    )
+    assert 'комментариев: 3, новостей: 1' in stdout.getvalue()
+    assert Comment.objects.count() == 5
+    call_command(
+        'moderate_comments', 'delete', '--author', author.username,
+        '--chunk-size', '2', stdout=StringIO(),
+    )
+    assert list(Comment.objects.all()) == kept
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    assert news.last_comment_at == kept[-1].created
+    response = client.get(reverse('news:search'), {'q': 'спам'})
+    assert list(response.context['comments']) == []
+
+
+@pytest.mark.django_db
+def test_moderate_comments_hides_bad_words(client, news, author, detail_url):
+    """Проверка, скрытые комментарии не видны и не входят в счётчики."""
+    good = build_comments(news, author, 1, text='Хороший')
+    build_comments(
+        news, author, 1, text=f'Ты {BAD_WORD}',
+        start=tz.now() + td(days=1),
+    )
+    call_command(
+        'moderate_comments', 'hide', '--bad-words', stdout=StringIO()
+    )
+    response = client.get(detail_url)
+    assert response.context['comment_page'].comments == good
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_comment_at == good[0].created
+    response = client.get(reverse('news:search'), {'q': BAD_WORD})
+    assert list(response.context['comments']) == []
+    call_command(
+        'moderate_comments', 'show', '--bad-words', stdout=StringIO()
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    response = client.get(reverse('news:search'), {'q': BAD_WORD})
+    assert len(response.context['comments']) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('file_format', ('csv', 'ndjson'))
+def test_import_comments(file_format, client, news, author, tmp_path):
+    """Проверка, импорт пропускает плохие строки и обновляет счётчики."""
+    rows = [
+        {'news': news.id, 'author': author.username, 'text': 'Первый',
+         'created': '2020-01-01T10:00:00+00:00'},
+        {'news': news.id, 'author': author.username, 'text': 'Второй',
+         'created': '2020-01-02T10:00:00+00:00'},
+        {'news': news.id, 'author': author.username,
+         'text': f'Текст, {BAD_WORD}, текст', 'created': ''},
+        {'news': news.id, 'author': 'Незнакомец', 'text': 'Текст',
+         'created': ''},
+        {'news': 0, 'author': author.username, 'text': 'Текст',
+         'created': ''},
+    ]
+    path = tmp_path / f'comments.{file_format}'
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if file_format == 'csv':
+            writer = csv.DictWriter(file, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            file.writelines(json.dumps(row) + '\n' for row in rows)
+    call_command(
+        'import_comments', str(path), '--chunk-size', '2', stdout=StringIO()
+    )
+    assert list(
+        Comment.objects.values_list('text', flat=True).order_by('created')
+    ) == ['Первый', 'Второй']
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    assert news.last_comment_at.day == 2
+    response = client.get(reverse('news:search'), {'q': 'вторым'})
+    assert [c.text for c in response.context['comments']] == ['Второй']
+
+
+@pytest.mark.django_db
+def test_import_comments_rejects_broken_rows(news, author, tmp_path):
+    """Проверка, битые строки отклоняются, а не прерывают импорт."""
+    good = json.dumps({'news': news.id, 'author': author.username,
+                       'text': 'Хороший'})
+    lines = [
+        good,
+        '{"news": ',
+        '[1, 2]',
+        json.dumps({'author': author.username, 'text': 'Без новости'}),
+        json.dumps({'news': news.id, 'text': 'Без автора'}),
+        json.dumps({'news': 'первая', 'author': author.username,
+                    'text': 'Текст'}),
+        json.dumps({'news': news.id, 'author': author.username,
+                    'text': 'Текст', 'created': 'вчера'}),
+        json.dumps({'news': news.id, 'author': author.username,
+                    'text': 'Текст', 'created': '2020-02-30T10:00:00'}),
+        good,
+    ]
+    path = tmp_path / 'comments.ndjson'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    out = StringIO()
+    call_command('import_comments', str(path), '--chunk-size', '4', stdout=out)
+    assert 'Готово: 2 комментариев, отклонено 7.' in out.getvalue()
+    assert Comment.objects.filter(text='Хороший').count() == 2
+
+
+@pytest.mark.django_db
+def test_import_comments_rejects_broken_csv_rows(news, author, tmp_path):
+    """Проверка, в CSV отклоняются строки без полей и с плохими news
+    и created.
+    """
+    path = tmp_path / 'comments.csv'
+    path.write_text(
+        'news,author,text,created\n'
+        f'{news.id},{author.username},Хороший,\n'
+        f'{news.id}\n'
+        f'первая,{author.username},Текст,\n'
+        f'{news.id},{author.username},Текст,вчера\n',
+        encoding='utf-8',
+    )
+    out = StringIO()
+    call_command('import_comments', str(path), stdout=out)
+    assert 'Готово: 1 комментариев, отклонено 3.' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_stream_loaddata_matches_loaddata():
+    """Проверка, потоковая загрузка даёт то же, что и loaddata."""
+    News.objects.all().delete()
+    fixture = os.path.join('news', 'fixtures', 'news.json')
+    call_command('loaddata', fixture, verbosity=0)
+    expected = list(News.objects.values_list('title', 'text', 'date'))
+    News.objects.all().delete()
+    call_command('stream_loaddata', fixture, '--chunk-size', '7',
+                 stdout=StringIO())
+    assert list(News.objects.values_list('title', 'text', 'date')) == expected
+
+
+@pytest.mark.django_db
+def test_stream_loaddata_resumes(author, tmp_path):
+    """Проверка, загрузка продолжается после ошибки и не дублирует."""
+    News.objects.all().delete()
+    objects = [
+        {'model': 'news.news', 'pk': index,
+         'fields': {'title': f'Новость {index}', 'text': 'Текст',
+                    'date': '2022-01-01'}}
+        for index in range(1, 5)
+    ] + [
+        {'model': 'news.comment', 'pk': index,
+         'fields': {'news': 1, 'author': author.pk, 'text': 'Текст',
+                    'created': f'2022-01-0{index}T10:00:00Z'}}
+        for index in range(1, 4)
+    ]
+    path = tmp_path / 'news.json'
+    fixture = json.dumps(objects, indent=1, ensure_ascii=False)
+    broken = fixture.replace('"Новость 3"', '"Новость 3",, ')
+    path.write_text(broken, encoding='utf-8')
+    with pytest.raises(CommandError):
+        call_command('stream_loaddata', str(path), '--chunk-size', '2',
+                     stdout=StringIO())
+    assert News.objects.count() == 2
+    path.write_text(fixture, encoding='utf-8')
+    call_command('stream_loaddata', str(path), '--chunk-size', '2',
+                 '--resume', stdout=StringIO())
+    assert News.objects.count() == 4
+    news = News.objects.get(pk=1)
+    assert news.comment_count == 3
+    assert news.last_comment_at.day == 3
+    assert not os.path.exists(f'{path}.progress')
+
+
+@pytest.mark.django_db
+def test_stream_loaddata_limits_object_size(tmp_path):
+    """Проверка, незакрытый объект не читается в память целиком,
+    а ошибка называет его смещение.
+    """
+    News.objects.all().delete()
+    first = json.dumps({'model': 'news.news', 'pk': 1, 'fields': {
+        'title': 'Новость', 'text': 'Текст', 'date': '2022-01-01'
+    }}, ensure_ascii=False)
+    head = f'[{first}, '
+    path = tmp_path / 'news.json'
+    path.write_text(
+        head + '{"model": "news.news", "fields": {"text": "'
+        + 'Текст ' * 50000,
+        encoding='utf-8',
+    )
+    with pytest.raises(CommandError, match=f'смещения {len(head.encode())} '):
+        call_command('stream_loaddata', str(path), '--chunk-size', '1',
+                     '--max-object-size', '1000', stdout=StringIO())
+    assert News.objects.count() == 1
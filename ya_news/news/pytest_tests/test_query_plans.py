@@ -0,0 +1,59 @@
+import re
+
+from django.urls import reverse
+import pytest
+
+pytestmark = pytest.mark.usefixtures('module_data')
+
+# subquery — это обход уже выбранных строк подзапроса, а не таблицы.
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW$|subquery$)\S+$')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'client_fixture, url',
+    [
+        ('client', pytest.lazy_fixture('home_url')),
+        ('client', pytest.lazy_fixture('detail_url')),
+        ('client', pytest.lazy_fixture('comments_url')),
+        ('author_client', pytest.lazy_fixture('edit_url')),
+        ('author_client', pytest.lazy_fixture('delete_url')),
+    ]
+)
+def test_views_use_indexes(
+    request, client_fixture, url, comment, query_plans
+):
+    """Проверка, запросы страниц не читают таблицы целиком."""
+    client = request.getfixturevalue(client_fixture)
+    plans = query_plans(client, url)
+    assert plans
+    for sql, plan in plans.items():
+        full_scans = [step for step in plan if FULL_SCAN.match(step)]
+        assert not full_scans, f'{sql}\n{plan}'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'query',
+    [
+        'is_hidden__exact=1',
+        'created__gte=2022-01-01+00:00:00%2B03:00'
+        '&created__lt=2022-01-08+00:00:00%2B03:00',
+    ]
+)
+def test_admin_comment_filters_use_indexes(
+    admin_client, comment, query, query_plans
+):
+    """Проверка, фильтры списка комментариев в админке
+    не читают таблицу комментариев целиком.
+
+    Фильтр «Нет» по is_hidden не проверяется: ему подходят почти все
+    комментарии, и запросы останавливаются на LIMIT.
+    """
+    plans = query_plans(
+        admin_client, f"{reverse('admin:news_comment_changelist')}?{query}"
+    )
+    assert plans
+    for sql, plan in plans.items():
+        full_scans = [step for step in plan if FULL_SCAN.match(step)]
+        assert not full_scans, f'{sql}\n{plan}'
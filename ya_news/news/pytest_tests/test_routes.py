@@ -1,8 +1,11 @@
 from http import HTTPStatus
 
+from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 import pytest
 
+pytestmark = pytest.mark.usefixtures('module_data')
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
@@ -13,6 +16,7 @@ import pytest
         pytest.lazy_fixture('logout_url'),
         pytest.lazy_fixture('signup_url'),
         pytest.lazy_fixture('detail_url'),
+        pytest.lazy_fixture('comments_url'),
     ]
 )
 def test_public_pages_availability(client, url):
@@ -68,3 +72,31 @@ def test_anonymous_redirect(client, url, login_url):
     redirect_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, redirect_url)
+
+
+@pytest.mark.django_db
+def test_detail_head_skips_rendering(
+    client, news, detail_url, django_assert_num_queries
+):
+    """Проверка, HEAD страницы новости не рендерит шаблон."""
+    with django_assert_num_queries(1):
+        response = client.head(detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert not response.templates
+
+
+@pytest.mark.django_db
+def test_detail_head_not_found(client):
+    """Проверка, HEAD несуществующей новости возвращает 404."""
+    response = client.head(reverse('news:detail', args=(0,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_detail_allowed_methods(client, detail_url):
+    """Проверка, неподдерживаемый метод получает список разрешённых."""
+    response = client.put(detail_url)
+    assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+    assert set(response['Allow'].split(', ')) == {
+        'GET', 'POST', 'HEAD', 'OPTIONS'
+    }
@@ -0,0 +1,158 @@
+"""
+Полнотекстовый поиск по новостям и комментариям на SQLite FTS5.
+
+В таблицах FTS5 хранятся не исходные тексты, а основы слов:
+встроенные токенизаторы SQLite умеют стемминг только для английского,
+поэтому русские слова приводятся к основам в Python через
+snowballstemmer. Запрос обрабатывается так же, и по «новостями»
+находится «новость». Результаты упорядочены по bm25. Индекс
+обновляют сигналы, после массовой загрузки его пересобирает
+команда rebuild_search_index.
+"""
+import re
+from functools import lru_cache
+
+import snowballstemmer
+from django.conf import settings
+from django.db import connection
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+
+_stemmers = {
+    'russian': snowballstemmer.stemmer('russian'),
+    'english': snowballstemmer.stemmer('english'),
+}
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """Основа слова в нижнем регистре, русского или английского."""
+    language = 'russian' if CYRILLIC_RE.search(word) else 'english'
+    return _stemmers[language].stemWord(word)
+
+
+def stem_text(text):
+    return ' '.join(stem(word) for word in WORD_RE.findall(text.lower()))
+
+
+def match_query(query):
+    """
+    Запрос пользователя в синтаксисе MATCH.
+
+    Каждая основа берётся в кавычки, чтобы символы из запроса
+    не разбирались как операторы FTS5; слова соединяются через И.
+    """
+    return ' '.join(
+        f'"{stem(word)}"' for word in WORD_RE.findall(query.lower())
+    )
+
+
+class SearchIndex:
+    """
+    Таблица FTS5 с основами слов из полей модели.
+
+    rowid строки совпадает с pk объекта, поля из unindexed
+    хранятся как есть и нужны, чтобы фильтровать выдачу до LIMIT.
+    """
+
+    def __init__(self, table, fields, weights=None, unindexed=()):
+        self.table = table
+        self.fields = fields
+        self.weights = weights or (1.0,) * len(fields)
+        self.unindexed = unindexed
+
+    def add(self, objects):
+        """Добавляет или обновляет объекты в индексе."""
+        columns = ('rowid',) + self.fields + self.unindexed
+        rows = [
+            [obj.pk]
+            + [stem_text(getattr(obj, name)) for name in self.fields]
+            + [getattr(obj, name) for name in self.unindexed]
+            for obj in objects
+        ]
+        if not rows:
+            return
+        placeholders = ', '.join(['%s'] * len(columns))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table} '
+                f'({", ".join(columns)}) VALUES ({placeholders})',
+                rows,
+            )
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [[pk] for pk in pks],
+            )
+
+    def remove_queryset(self, queryset):
+        """Удаляет строки объектов из queryset одним запросом."""
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid IN ({sql})', params
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def prune(self, model):
+        """Удаляет из индекса строки объектов, которых уже нет в базе."""
+        if self.table not in connection.introspection.table_names():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid NOT IN '
+                f'(SELECT {model._meta.pk.column} FROM {model._meta.db_table})'
+            )
+
+    def ids(self, query, limit=None, **filters):
+        """
+        Pk объектов, подходящих под запрос, лучшие первыми.
+
+        Лучшие выбираются среди SEARCH_CANDIDATES последних
+        добавленных совпадений. filters сравниваются с полями
+        из unindexed на равенство.
+        """
+        match = match_query(query)
+        if not match:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        where = f'WHERE {self.table} MATCH %s' + ''.join(
+            f' AND {name} = %s' for name in filters
+        )
+        params = [match, *filters.values()]
+        # bm25 считается только для SEARCH_CANDIDATES самых новых
+        # совпадений: FTS5 отдаёт их по rowid без перебора остальных,
+        # и частое слово не заставляет ранжировать всю таблицу.
+        oldest = (
+            f'SELECT rowid FROM {self.table} {where} '
+            f'ORDER BY rowid DESC LIMIT 1 OFFSET %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} {where} '
+                f'AND rowid >= COALESCE(({oldest}), 0) '
+                f'ORDER BY bm25({self.table}, {weights}) LIMIT %s',
+                params + params + [
+                    settings.SEARCH_CANDIDATES - 1,
+                    limit or settings.SEARCH_RESULTS_LIMIT,
+                ],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def search(self, queryset, query, limit=None, **filters):
+        """Объекты из queryset, подходящие под запрос, лучшие первыми."""
+        ids = self.ids(query, limit, **filters)
+        objects = queryset.in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
+
+
+NEWS_INDEX = SearchIndex(
+    'news_news_search', ('title', 'text'), weights=(10.0, 1.0)
+)
+COMMENT_INDEX = SearchIndex('news_comment_search', ('text',))
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_delete,
+)
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .bulk_actions import delete_comments
+from .cache import bump_news_version
+from .counters import comment_added, comment_removed, recount
+from .models import Comment, News
+from .search import COMMENT_INDEX, NEWS_INDEX
+
+
+@receiver((post_save, post_delete), sender=News)
+def news_changed(sender, instance, **kwargs):
+    bump_news_version(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_news_version(instance.news_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    comment_removed(instance)
+
+
+@receiver(pre_delete, sender=News)
+def news_comments_deleted(sender, instance, **kwargs):
+    """Комментарии удаляемой новости удаляются одним запросом."""
+    delete_comments(Comment.objects.filter(news_id=instance.pk))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def author_comments_deleted(sender, instance, **kwargs):
+    """
+    Комментарии удаляемого пользователя удаляются одним запросом.
+
+    Счётчики затронутых новостей пересчитываются одним UPDATE.
+    """
+    comments = Comment.objects.filter(author_id=instance.pk)
+    news_ids = list(
+        comments.order_by().values_list('news_id', flat=True).distinct()
+    )
+    if not news_ids:
+        return
+    delete_comments(comments)
+    recount(News.objects.filter(pk__in=news_ids))
+    for news_id in news_ids:
+        bump_news_version(news_id)
+
+
+@receiver(post_save, sender=News)
+def news_indexed(sender, instance, **kwargs):
+    NEWS_INDEX.add([instance])
+
+
+@receiver(post_delete, sender=News)
+def news_unindexed(sender, instance, **kwargs):
+    NEWS_INDEX.remove([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def comment_indexed(sender, instance, **kwargs):
+    if not instance.is_hidden:
+        COMMENT_INDEX.add([instance])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_unindexed(sender, instance, **kwargs):
+    COMMENT_INDEX.remove([instance.pk])
+
+
+@receiver(post_migrate)
+def search_index_pruned(sender, **kwargs):
+    """
+    Чистит индекс после flush.
+
+    flush, в том числе между тестами с транзакциями, очищает таблицы
+    моделей без сигналов удаления, а pk потом выдаются заново.
+    """
+    if sender.name == 'news':
+        NEWS_INDEX.prune(News)
+        COMMENT_INDEX.prune(Comment)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS из настроек к новому соединению."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
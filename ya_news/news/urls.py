@@ -1,12 +1,23 @@
 from django.urls import path
 
 from news import views
+from news.async_views import for_url
 
 app_name = 'news'
 
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', for_url('news:home', views.NewsList.as_view()), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path(
+        'news/<int:pk>/',
+        for_url('news:detail', views.NewsDetailView.as_view()),
+        name='detail'
+    ),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
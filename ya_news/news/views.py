@@ -1,13 +1,53 @@
+import hashlib
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Exists, Q, Subquery
+from django.http import Http404, HttpResponse
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .cache import get_home_version, get_news_version
 from .forms import CommentForm
 from .models import Comment, News
+from .search import COMMENT_INDEX, NEWS_INDEX
+
+
+def user_etag(request):
+    """
+    Часть ETag, которая отличает пользователей.
+
+    Для вошедшего пользователя в неё входит и отпечаток CSRF-cookie:
+    в формах страницы лежит токен от этой cookie, и после её смены
+    браузер не должен получить 304 и показать форму со старым токеном.
+    """
+    if not request.user.is_authenticated:
+        return '0'
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    digest = hashlib.sha256(csrf_cookie.encode()).hexdigest()[:16]
+    return f'{request.user.pk}-{digest}'
+
+
+def home_etag(request, *args, **kwargs):
+    """
+    Метка ETag главной страницы из версии её кэша, без запросов к базе.
+
+    Страница отличается для разных пользователей, поэтому в ETag
+    входит и user_etag.
+    """
+    return f'home-{get_home_version()}-{user_etag(request)}'
 
 
+def news_etag(request, pk, *args, **kwargs):
+    """Метка ETag страницы новости из её версии, без запросов к базе."""
+    return f'news-{pk}-{get_news_version(pk)}-{user_etag(request)}'
+
+
+@method_decorator(condition(etag_func=home_etag), name='dispatch')
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
@@ -18,32 +58,132 @@ class NewsList(generic.ListView):
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев хранится в самой новости.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['home_version'] = get_home_version()
+        context['cache_timeout'] = settings.NEWS_CACHE_TIMEOUT
+        return context
 
 
-class NewsDetail(generic.DetailView):
+class NewsSearch(generic.ListView):
+    """Поиск по новостям и комментариям."""
     model = News
-    template_name = 'news/detail.html'
+    template_name = 'news/search.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get_queryset(self):
+        """Новости, подходящие под запрос, самые подходящие первыми."""
+        self.query = self.request.GET.get('q', '').strip()
+        return NEWS_INDEX.search(self.model.objects.all(), self.query)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['comments'] = COMMENT_INDEX.search(
+            Comment.objects.filter(is_hidden=False).select_related(
+                'author', 'news'
+            ),
+            self.query,
         )
-        return obj
+        return context
+
+
+class CommentPage:
+    """
+    Страница комментариев к новости.
+
+    Страницы отсчитываются от последнего показанного комментария
+    по ключу (created, id), а не через OFFSET: запрос идёт по индексу
+    и не зависит от того, насколько далеко пролистан список.
+    Запрос выполняется при первом обращении к комментариям, поэтому
+    закэшированный фрагмент страницы обходится без него.
+    """
+
+    def __init__(self, news_id, after=None, per_page=None):
+        self.news_id = news_id
+        self.after = after
+        self.per_page = per_page or settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+
+    def get_queryset(self):
+        comments = Comment.objects.filter(
+            news_id=self.news_id, is_hidden=False
+        ).select_related('author').order_by('created', 'id')
+        if self.after is not None:
+            cursor = Comment.objects.filter(
+                pk=self.after, news_id=self.news_id
+            )
+            created = Subquery(cursor.values('created'))
+            # Если комментарий-курсор уже удалён, страница продолжается
+            # по id: комментарии создаются в порядке возрастания id.
+            comments = comments.filter(
+                Q(created__gt=created)
+                | Q(created=created, id__gt=self.after)
+                | Q(~Exists(cursor), id__gt=self.after)
+            )
+        return comments
+
+    @cached_property
+    def _rows(self):
+        return list(self.get_queryset()[:self.per_page + 1])
+
+    @property
+    def comments(self):
+        return self._rows[:self.per_page]
+
+    @property
+    def next_cursor(self):
+        if len(self._rows) > self.per_page:
+            return self.comments[-1].pk
+        return None
+
+
+class CommentPageMixin:
+    """Добавляет в контекст страницу комментариев и версию кэша новости."""
+    cursor_param = 'after'
+
+    def get_comments_context(self, news_id):
+        after = self.request.GET.get(self.cursor_param)
+        if after is not None:
+            try:
+                after = int(after)
+            except ValueError:
+                raise Http404
+        return {
+            'comment_page': CommentPage(news_id, after),
+            'news_version': get_news_version(news_id),
+            'cache_timeout': settings.NEWS_CACHE_TIMEOUT,
+        }
+
+
+@method_decorator(condition(etag_func=news_etag), name='dispatch')
+class NewsDetail(CommentPageMixin, generic.DetailView):
+    model = News
+    template_name = 'news/detail.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object.pk))
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(CommentPageMixin, generic.TemplateView):
+    """Следующая страница комментариев в виде HTML-фрагмента."""
+    template_name = 'news/includes/cached_comments.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.kwargs['pk']))
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -56,26 +196,67 @@ class NewsComment(
         return super().post(request, *args, **kwargs)
 
     def form_valid(self, form):
+        """Комментарий и счётчики новости сохраняются вместе."""
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
         return super().form_valid(form)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object.pk))
+        return context
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
-class NewsDetailView(generic.View):
+class MethodDispatchView(generic.View):
+    """
+    Передаёт запрос готовому view в зависимости от HTTP-метода.
 
-    def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+    Вложенные view задаются в method_views и собираются через as_view()
+    один раз при объявлении класса, а не на каждый запрос.
+    Методы, объявленные в самом классе, обрабатываются им напрямую.
+    """
+    method_views = {}
 
-    def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.method_handlers = {
+            method: view_class.as_view()
+            for method, view_class in cls.method_views.items()
+        }
+
+    def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        if not hasattr(self, method) and method in self.method_handlers:
+            return self.method_handlers[method](request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def _allowed_methods(self):
+        return [
+            method.upper() for method in self.http_method_names
+            if hasattr(self, method) or method in self.method_handlers
+        ]
+
+
+class NewsDetailView(MethodDispatchView):
+    """Страница новости: просмотр и добавление комментария."""
+    method_views = {
+        'get': NewsDetail,
+        'post': NewsComment,
+    }
+
+    def head(self, request, *args, **kwargs):
+        """Проверяем только, что новость есть, шаблон не рендерим."""
+        if not News.objects.filter(pk=kwargs['pk']).exists():
+            raise Http404
+        return HttpResponse()
 
 
 class CommentBase(LoginRequiredMixin):
@@ -83,9 +264,9 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен, новость для адреса не нужна."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
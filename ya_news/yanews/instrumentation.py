@@ -0,0 +1,163 @@
+"""
+Замеры запросов к базе и времени ответа по именам URL.
+
+Middleware включается настройкой INSTRUMENTATION_ENABLED. Для каждого
+запроса она считает SQL-запросы, повторы одинаковых запросов, время
+в базе, время рендеринга шаблона и полное время ответа. Последние
+записи хранятся в кольцевом буфере в памяти процесса, отдаются
+в JSON через stats_view и в заголовке Server-Timing ответа.
+"""
+import math
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+
+MIDDLEWARE_PATH = 'yanews.instrumentation.InstrumentationMiddleware'
+
+_buffer = deque(maxlen=settings.INSTRUMENTATION_BUFFER_SIZE)
+_listeners = []
+
+
+@dataclass
+class RequestRecord:
+    view_name: str
+    method: str
+    path: str
+    status: int
+    queries: int
+    duplicates: int
+    db_ms: float
+    template_ms: float
+    total_ms: float
+
+
+class QueryCollector:
+    """Обёртка для execute_wrapper: считает запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        return sum(
+            number - 1 for number in self.statements.values() if number > 1
+        )
+
+
+def record_request(record):
+    _buffer.append(record)
+    for listener in _listeners:
+        listener.append(record)
+
+
+def get_records():
+    return list(_buffer)
+
+
+@contextmanager
+def recording():
+    """Собирает записи о запросах, прошедших внутри блока."""
+    records = []
+    _listeners.append(records)
+    try:
+        yield records
+    finally:
+        _listeners.remove(records)
+
+
+def percentile(values, share):
+    """Значение, которого не превышает доля share всех значений."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+def summarize(records):
+    """Сводка по именам URL: число ответов, средние, процентили, максимумы."""
+    groups = {}
+    for record in records:
+        groups.setdefault(record.view_name, []).append(record)
+    summary = {}
+    for view_name, group in groups.items():
+        summary[view_name] = {
+            'requests': len(group),
+            'queries_avg': sum(r.queries for r in group) / len(group),
+            'queries_max': max(r.queries for r in group),
+            'duplicates_max': max(r.duplicates for r in group),
+            'db_ms_avg': sum(r.db_ms for r in group) / len(group),
+            'template_ms_avg': sum(r.template_ms for r in group) / len(group),
+            'total_ms_avg': sum(r.total_ms for r in group) / len(group),
+            'total_ms_p50': percentile([r.total_ms for r in group], 0.5),
+            'total_ms_p95': percentile([r.total_ms for r in group], 0.95),
+            'total_ms_p99': percentile([r.total_ms for r in group], 0.99),
+            'total_ms_max': max(r.total_ms for r in group),
+        }
+    return summary
+
+
+class InstrumentationMiddleware:
+    """Записывает замеры каждого запроса в буфер и Server-Timing."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        request.template_duration = 0.0
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        record = RequestRecord(
+            view_name=match.view_name if match else None,
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            queries=collector.count,
+            duplicates=collector.duplicates,
+            db_ms=collector.duration * 1000,
+            template_ms=request.template_duration * 1000,
+            total_ms=total * 1000,
+        )
+        record_request(record)
+        response['Server-Timing'] = (
+            f'db;dur={record.db_ms:.2f};desc="{record.queries} queries", '
+            f'tpl;dur={record.template_ms:.2f}, '
+            f'total;dur={record.total_ms:.2f}'
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        """Рендерим здесь, чтобы замерить время шаблона отдельно."""
+        started = time.perf_counter()
+        response.render()
+        request.template_duration = time.perf_counter() - started
+        return response
+
+
+@staff_member_required
+def stats_view(request):
+    records = get_records()
+    return JsonResponse({
+        'summary': summarize(records),
+        'recent': [asdict(record) for record in records[-100:]],
+    })
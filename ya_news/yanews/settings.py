@@ -1,5 +1,8 @@
+import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,6 +31,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanews.ratelimit.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
@@ -55,12 +59,64 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # При параллельном прогоне тестов у каждого процесса своя
+        # тестовая база в файле из DJANGO_TEST_DB, её можно оставлять
+        # между прогонами (--reuse-db). По умолчанию база в памяти.
+        'TEST': {
+            'NAME': os.getenv('DJANGO_TEST_DB'),
+        },
     }
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+    },
+}
+
+# Фрагменты сбрасываются по версии новости, время жизни — запасное.
+NEWS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
 AUTH_PASSWORD_VALIDATORS = []
 
+# Хешеры паролей по профилям, профиль выбирает DJANGO_PASSWORD_HASHERS.
+# fast проверяет старые хеши, но новые считает MD5 без итераций: это
+# только для тестов и нагрузочных прогонов, тесты включают его сами,
+# см. yanews/testing.py.
+PASSWORD_HASHER_PROFILES = {
+    'default': [
+        'yanews.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ],
+}
+PASSWORD_HASHER_PROFILES['fast'] = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    *PASSWORD_HASHER_PROFILES['default'],
+]
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[
+    os.getenv('DJANGO_PASSWORD_HASHERS', 'default')
+]
+# Число итераций PBKDF2, по умолчанию — как в Django. Чем меньше,
+# тем дешевле вход и тем легче подобрать пароль по утёкшему хешу.
+PASSWORD_HASH_ITERATIONS = int(os.getenv('DJANGO_PASSWORD_ITERATIONS', 0))
+
+# Пользователь для каждого запроса берётся из кэша, см. news/auth.py.
+# В сессиях, открытых до появления кэша, записан ModelBackend: без него
+# в списке эти пользователи разлогинились бы.
+AUTHENTICATION_BACKENDS = [
+    'news.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_TIMEOUT = 60 * 5
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -80,3 +136,126 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 20
+
+SEARCH_RESULTS_LIMIT = 20
+# Среди скольких последних совпадений выбирать лучшие результаты.
+SEARCH_CANDIDATES = 1000
+
+# Файл со списком запрещённых слов: одна запись на строку,
+# «основа*» — поиск по началу слова. Перечитывается при изменении.
+BAD_WORDS_FILE = None
+
+# Замеры запросов к базе и времени ответа, см. yanews/instrumentation.py.
+INSTRUMENTATION_ENABLED = os.getenv('DJANGO_INSTRUMENTATION') == '1'
+INSTRUMENTATION_BUFFER_SIZE = 1000
+
+# Сколько запросов к базе может выполнить один ответ view.
+# Точки сохранения транзакций тоже считаются запросами.
+QUERY_BUDGETS = {
+    'news:home': 3,
+    'news:detail': 8,
+    'news:comments': 3,
+    'news:edit': 5,
+    'news:delete': 6,
+    'news:search': 6,
+    'admin:news_news_changelist': 6,
+    'admin:news_news_change': 14,
+    'admin:news_comment_changelist': 4,
+    'admin:news_comment_change': 8,
+}
+
+# Сколько запросов, изменяющих данные, можно сделать за период
+# в секундах: имя URL -> (запросов, период). См. yanews/ratelimit.py.
+# Счётчики хранятся в кэше RATE_LIMIT_CACHE с атомарным incr.
+RATE_LIMIT_CACHE = 'ratelimit'
+RATE_LIMITS = {
+    'news:detail': (10, 60),
+}
+
+if INSTRUMENTATION_ENABLED:
+    MIDDLEWARE.insert(0, 'yanews.instrumentation.InstrumentationMiddleware')
+
+# URL, которые под ASGI обслуживаются асинхронно, через запятую,
+# например DJANGO_ASYNC_VIEWS=news:home,news:detail. См. news/async_views.py.
+ASYNC_READ_VIEWS = set(filter(None, os.getenv(
+    'DJANGO_ASYNC_VIEWS', ''
+).split(',')))
+ASYNC_READ_WORKERS = 8
+
+# Хранилища сессий, DJANGO_SESSIONS выбирает одно из них. db читает
+# таблицу django_session на каждом запросе с сессией; cached_db читает
+# кэш, а базу — только при промахе; signed_cookies хранит сессию
+# в подписанной cookie и к базе не обращается, но выход из аккаунта
+# не отзывает уже выданную cookie. Истёкшие сессии из таблицы удаляет
+# команда purge_sessions.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.getenv('DJANGO_SESSIONS', 'db')]
+
+# Профиль окружения: DJANGO_ENV=production включает настройки для боевого
+# сервера, по умолчанию остаются настройки для разработки и тестов.
+ENVIRONMENT = os.getenv('DJANGO_ENV', 'development')
+
+# PRAGMA, которые выполняются на каждом новом соединении с SQLite.
+SQLITE_PRAGMAS = {}
+
+if ENVIRONMENT == 'production':
+    # Ключ из репозитория известен всем: с ним можно подделать
+    # сессии и подписанные данные.
+    SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
+    if not SECRET_KEY:
+        raise ImproperlyConfigured(
+            'При DJANGO_ENV=production нужна переменная DJANGO_SECRET_KEY.'
+        )
+    DEBUG = False
+    ALLOWED_HOSTS = os.getenv(
+        'DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1'
+    ).split(',')
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        # Отрицательное значение — размер в КиБ, а не в страницах.
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    SESSION_ENGINE = SESSION_ENGINES[
+        os.getenv('DJANGO_SESSIONS', 'cached_db')
+    ]
+    # MD5 из профиля fast пересчитал бы при входе пароли пользователей.
+    PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES['default']
+    # Версии фрагментов и ETag новостей должны быть общими
+    # для всех процессов сервера, locmem у каждого процесса свой.
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv(
+                'DJANGO_CACHE_DIR',
+                os.path.join(tempfile.gettempdir(), 'yanews-cache'),
+            ),
+        },
+        # Счётчикам лимитов FileBasedCache не подходит: incr в нём
+        # не атомарный. В locmem лимиты считаются в каждом процессе
+        # отдельно, то есть при N процессах допускают до N * requests
+        # запросов. Общий для всех процессов счётчик — Memcached
+        # по адресу из DJANGO_RATELIMIT_MEMCACHED.
+        RATE_LIMIT_CACHE: CACHES[RATE_LIMIT_CACHE],
+    }
+    if os.getenv('DJANGO_RATELIMIT_MEMCACHED'):
+        CACHES[RATE_LIMIT_CACHE] = {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('DJANGO_RATELIMIT_MEMCACHED'),
+        }
@@ -0,0 +1,129 @@
+"""
+Плагин pytest: бюджет запросов к базе для каждого view.
+
+Бюджеты задаются в настройке QUERY_BUDGETS по именам URL, для
+отдельного теста их можно переопределить маркером
+``@pytest.mark.query_budget('news:home', 1)``. Тест падает, если
+хотя бы один ответ view за время теста выполнил больше запросов,
+чем разрешено.
+
+Для параллельного прогона (run_tests.sh --parallel) здесь же:
+--shard N/M оставляет N-ю из M частей тестов, --durations-out
+записывает время каждого теста в JSON, а по --durations-in с временем
+прошлого прогона части подбираются примерно равными по времени.
+Фикстура fast_password_hashers включает на весь прогон профиль
+хешеров fast: PBKDF2 тратит на каждый create_user и вход
+по четверти секунды.
+Подключается импортом хуков в conftest.py.
+"""
+import json
+import os
+import unittest
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+from .instrumentation import MIDDLEWARE_PATH, recording
+
+# Время теста, которого нет в профиле прошлого прогона.
+UNKNOWN_DURATION = 0.01
+
+_durations = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('shards', 'параллельный прогон тестов')
+    group.addoption(
+        '--shard', help='Запустить только N-ю из M частей тестов: N/M.'
+    )
+    group.addoption(
+        '--durations-in',
+        help='JSON со временем тестов, по нему части делаются равными.',
+    )
+    group.addoption(
+        '--durations-out', help='Записать время каждого теста в JSON.'
+    )
+
+
+def _shard_key(item):
+    """Тесты одного TestCase попадают в одну часть: setUpTestData общий."""
+    if item.cls is not None and issubclass(item.cls, unittest.TestCase):
+        return item.nodeid.rsplit('::', 1)[0]
+    return item.nodeid
+
+
+def pytest_collection_modifyitems(config, items):
+    shard = config.getoption('shard')
+    if not shard:
+        return
+    index, total = (int(part) for part in shard.split('/'))
+    durations = {}
+    path = config.getoption('durations_in')
+    if path and os.path.exists(path):
+        with open(path) as file:
+            durations = json.load(file)
+    weights = {}
+    for item in items:
+        key = _shard_key(item)
+        weights[key] = weights.get(key, 0.0) + durations.get(
+            item.nodeid, UNKNOWN_DURATION
+        )
+    # Самые долгие группы первыми, каждую — в наименее загруженную часть.
+    loads = [0.0] * total
+    selected = set()
+    for key in sorted(weights, key=lambda key: (-weights[key], key)):
+        part = loads.index(min(loads))
+        loads[part] += weights[key]
+        if part == index - 1:
+            selected.add(key)
+    deselected = [item for item in items if _shard_key(item) not in selected]
+    items[:] = [item for item in items if _shard_key(item) in selected]
+    config.hook.pytest_deselected(items=deselected)
+
+
+def pytest_runtest_logreport(report):
+    _durations[report.nodeid] = (
+        _durations.get(report.nodeid, 0.0) + report.duration
+    )
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption('durations_out')
+    if path:
+        with open(path, 'w') as file:
+            json.dump(_durations, file, indent=1, sort_keys=True)
+
+
+@pytest.fixture(autouse=True, scope='session')
+def fast_password_hashers():
+    with override_settings(
+        PASSWORD_HASHERS=settings.PASSWORD_HASHER_PROFILES['fast']
+    ):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    budgets = dict(settings.QUERY_BUDGETS)
+    for marker in reversed(list(item.iter_markers('query_budget'))):
+        view_name, queries = marker.args
+        budgets[view_name] = queries
+    middleware = list(settings.MIDDLEWARE)
+    if MIDDLEWARE_PATH not in middleware:
+        middleware.insert(0, MIDDLEWARE_PATH)
+    with override_settings(MIDDLEWARE=middleware), recording() as records:
+        outcome = yield
+    if outcome.excinfo is not None:
+        return
+    over_budget = [
+        f'{record.method} {record.path} ({record.view_name}): '
+        f'{record.queries} > {budgets[record.view_name]}'
+        for record in records
+        if record.queries > budgets.get(record.view_name, record.queries)
+    ]
+    if over_budget:
+        pytest.fail(
+            'Превышен бюджет запросов к базе:\n' + '\n'.join(over_budget),
+            pytrace=False,
+        )
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.forms import UserCreationForm
@@ -34,3 +35,8 @@ auth_urls = ([
 ], 'users')
 
 urlpatterns += [path('auth/', include(auth_urls))]
+
+if settings.INSTRUMENTATION_ENABLED:
+    from .instrumentation import stats_view
+
+    urlpatterns += [path('__stats__/', stats_view, name='instrumentation')]
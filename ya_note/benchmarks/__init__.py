@@ -0,0 +1,38 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    """Настраивает Django для запуска бенчмарка как скрипта."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    django.setup()
+
+
+@contextmanager
+def temporary_database(path=None):
+    """
+    Временная база в файле с применёнными миграциями.
+
+    Файл, а не память, нужен, чтобы PRAGMA из настроек работали
+    так же, как на настоящей базе. Если задан path, база не удаляется
+    и при следующем запуске используется снова вместе с данными.
+    """
+    from django.db import connection
+
+    keepdb = path is not None
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['TEST']['NAME'] = path or os.path.join(
+            directory, 'bench.sqlite3'
+        )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, keepdb=keepdb
+        )
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=keepdb
+            )
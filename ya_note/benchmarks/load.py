@@ -0,0 +1,320 @@
+r"""
+Нагрузочный прогон страниц YaNote на большом наборе данных.
+
+Запросы идут через WSGI-обработчик Django в том же процессе
+из WORKERS потоков, у каждого потока свой клиент и свой пользователь.
+Каждый сценарий гоняется DURATION секунд, в отчёт попадают процентили
+времени ответа, число запросов в секунду, число ошибок и запросов
+к базе. Отчёт печатается в JSON, чтобы сравнивать его между коммитами:
+
+    python -m benchmarks.load --database /tmp/load.sqlite3 > before.json
+    python -m benchmarks.load --database /tmp/load.sqlite3 \
+        --baseline before.json > after.json
+
+Полный набор из миллиона заметок у 10 тысяч пользователей:
+
+    python -m benchmarks.load --database /tmp/load.sqlite3 \
+        --notes 1000000 --users 10000
+
+Заметки вставляются через bulk_create и попадают в поисковый индекс
+только после правки в сценарии notes:edit.
+Вход в сценарии users:login POST почти целиком — хеширование пароля,
+его стоимость задают DJANGO_PASSWORD_HASHERS и DJANGO_PASSWORD_ITERATIONS:
+
+    DJANGO_PASSWORD_ITERATIONS=100000 python -m benchmarks.load \
+        --database /tmp/load.sqlite3 --scenario 'users:login POST'
+
+Хранилища сессий сравниваются так же, через DJANGO_SESSIONS.
+Лимиты RATE_LIMITS на время прогона поднимаются до недостижимых:
+ограничитель работает, но не срабатывает. --no-rate-limits
+отключает его, разница двух прогонов — его накладные расходы.
+Сценарии с POST пишут в базу, и сохранённая в --database база
+от прогона к прогону немного растёт.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from benchmarks import setup, temporary_database
+
+WORKERS = 8
+DURATION = 10
+WARMUP = 20
+CHUNK_SIZE = 10_000
+SEED = 0
+PASSWORD = 'load-password'
+
+
+def chunked(objects, size=CHUNK_SIZE):
+    objects = iter(objects)
+    while True:
+        chunk = list(islice(objects, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def seed(users_count, notes_count):
+    """Пользователи и поровну заметок у каждого из них."""
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from notes.models import Note
+
+    User = get_user_model()
+    for chunk in chunked(
+        User(username=f'user{index}') for index in range(users_count)
+    ):
+        User.objects.bulk_create(chunk)
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    notes = (
+        Note(
+            title=f'Заметка {index}',
+            text='Текст заметки. ' * 20,
+            slug=f'note-{index}',
+            author_id=user_ids[index % len(user_ids)],
+        )
+        for index in range(notes_count)
+    )
+    created = 0
+    for chunk in chunked(notes):
+        with transaction.atomic():
+            Note.objects.bulk_create(chunk)
+        created += len(chunk)
+        print(f'заметок: {created}', file=sys.stderr)
+
+
+def data_sizes():
+    from django.contrib.auth import get_user_model
+    from notes.models import Note
+
+    return {
+        'users': get_user_model().objects.count(),
+        'notes': Note.objects.count(),
+    }
+
+
+def scenarios(clients):
+    """
+    Сценарии по именам.
+
+    Сценарий по генератору случайных чисел и пользователю выбирает
+    метод, адрес и данные следующего запроса.
+    """
+    from django.urls import reverse
+    from notes.models import Note
+
+    slugs = {
+        user.pk: list(Note.objects.filter(author=user).values_list(
+            'slug', flat=True
+        ))
+        for user, _ in clients
+    }
+
+    def notes_list(rng, user):
+        return 'get', reverse('notes:list'), None
+
+    def add(rng, user):
+        return 'post', reverse('notes:add'), {
+            'title': 'Новая заметка',
+            'text': 'Текст новой заметки',
+            'slug': f'load-{uuid.uuid4().hex}',
+        }
+
+    def edit(rng, user):
+        slug = rng.choice(slugs[user.pk])
+        return 'post', reverse('notes:edit', args=(slug,)), {
+            'title': f'Заметка {rng.randrange(10**6)}',
+            'text': 'Исправленный текст заметки',
+            'slug': slug,
+        }
+
+    def login(rng, user):
+        return 'post', reverse('users:login'), {
+            'username': user.username, 'password': PASSWORD,
+        }
+
+    return {
+        'notes:list': notes_list,
+        'notes:add': add,
+        'notes:edit': edit,
+        'users:login POST': login,
+    }
+
+
+def make_clients(count):
+    """
+    Пары из пользователя и клиента, вошедшего под ним.
+
+    Всем пользователям задаётся пароль PASSWORD для сценария входа,
+    один хеш на всех: считать его для каждого долго. Пароль меняется
+    до входа, иначе сессии клиентов стали бы недействительными.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.test import Client
+
+    get_user_model().objects.update(password=make_password(PASSWORD))
+    clients = []
+    for user in get_user_model().objects.order_by('pk')[:count]:
+        client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+        client.force_login(user)
+        clients.append((user, client))
+    return clients
+
+
+def run(scenario, clients, duration):
+    """Гоняет сценарий в потоках, по одному на пользователя."""
+    from django.conf import settings
+    from django.db import connection
+    from django.test import override_settings
+    from yanote.instrumentation import (
+        MIDDLEWARE_PATH, percentile, recording
+    )
+
+    def worker(index):
+        user, client = clients[index]
+        rng = random.Random(SEED + index + 1)
+        timings = []
+        try:
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                method, url, data = scenario(rng, user)
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                timings.append((
+                    (time.perf_counter() - started) * 1000,
+                    response.status_code,
+                ))
+        finally:
+            connection.close()
+        return timings
+
+    middleware = [MIDDLEWARE_PATH] + [
+        path for path in settings.MIDDLEWARE if path != MIDDLEWARE_PATH
+    ]
+    rng = random.Random(SEED)
+    user, client = clients[0]
+    for _ in range(WARMUP):
+        method, url, data = scenario(rng, user)
+        getattr(client, method)(url, data)
+    with override_settings(MIDDLEWARE=middleware), recording() as records:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+            timings = [
+                timing
+                for result in pool.map(worker, range(len(clients)))
+                for timing in result
+            ]
+        elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in timings]
+    queries = [record.queries for record in records]
+    return {
+        'requests': len(timings),
+        'errors': sum(status >= 400 for _, status in timings),
+        'rps': len(timings) / elapsed,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies),
+        },
+        'queries_avg': sum(queries) / len(queries),
+        'queries_max': max(queries),
+    }
+
+
+def unreachable_rate_limits():
+    """RATE_LIMITS с теми же периодами, но без достижимых лимитов."""
+    from django.conf import settings
+
+    return {
+        name: (10**9, period)
+        for name, (_, period) in settings.RATE_LIMITS.items()
+    }
+
+
+def current_commit():
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        capture_output=True, text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def compare(baseline, report):
+    """Печатает изменение запросов в секунду и p95 против baseline."""
+    for name, result in report['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        print(
+            f'{name:<18} '
+            f'{old["rps"]:>8.1f} -> {result["rps"]:>8.1f} запросов/с '
+            f'({result["rps"] / old["rps"] - 1:+.0%}), '
+            f'p95 {old["latency_ms"]["p95"]:.1f} -> '
+            f'{result["latency_ms"]["p95"]:.1f} мс',
+            file=sys.stderr,
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database', help='Файл базы, чтобы не заполнять '
+                        'данные при каждом запуске.')
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--notes', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--duration', type=float, default=DURATION)
+    parser.add_argument('--scenario', action='append',
+                        help='Гонять только этот сценарий.')
+    parser.add_argument('--no-rate-limits', action='store_true',
+                        help='Отключить ограничение частоты запросов.')
+    parser.add_argument('--baseline', help='Отчёт прошлого прогона '
+                        'для сравнения.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup()
+    from django.conf import settings
+    from django.test import override_settings
+    from notes.models import Note
+
+    with temporary_database(args.database):
+        if not Note.objects.exists():
+            seed(args.users, args.notes)
+        clients = make_clients(args.workers)
+        report = {
+            'project': 'ya_note',
+            'commit': current_commit(),
+            'environment': settings.ENVIRONMENT,
+            'data': data_sizes(),
+            'workers': len(clients),
+            'duration': args.duration,
+            'rate_limits': not args.no_rate_limits,
+            'results': {},
+        }
+        rate_limits = (
+            {} if args.no_rate_limits else unreachable_rate_limits()
+        )
+        with override_settings(RATE_LIMITS=rate_limits):
+            for name, scenario in scenarios(clients).items():
+                if args.scenario and name not in args.scenario:
+                    continue
+                report['results'][name] = run(scenario, clients, args.duration)
+                print(f'{name}: готово', file=sys.stderr)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+"""Хуки и фикстуры плагина, им нужен conftest.py в корне проекта."""
+from yanote.testing import (  # noqa: F401
+    fast_password_hashers,
+    pytest_addoption,
+    pytest_collection_modifyitems,
+    pytest_runtest_logreport,
+    pytest_sessionfinish,
+)
@@ -0,0 +1,29 @@
+"""
+Бэкенд аутентификации, который загружает пользователя из кэша.
+
+AuthenticationMiddleware на каждом запросе загружает пользователя
+по id из сессии, и без кэша это отдельный SELECT. Пользователь лежит
+в кэше USER_CACHE_TIMEOUT секунд, сигналы сбрасывают его при
+сохранении и удалении, в том числе при смене пароля и last_login.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_KEY = 'auth:user:{}'
+
+
+def forget_user(user_id):
+    cache.delete(USER_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
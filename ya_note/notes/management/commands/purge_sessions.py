@@ -0,0 +1,45 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии из django_session пачками: ключи '
+        'выбираются по индексу expire_date, каждая пачка — один DELETE '
+        'по первичному ключу. clearsessions удаляет всё одним запросом '
+        'и держит блокировку базы, пока не закончит.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько сессий удалять за один DELETE.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками в секундах, чтобы пропустить '
+                 'запросы сайта.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        expired = Session.objects.filter(
+            expire_date__lt=timezone.now()
+        ).order_by('expire_date')
+        purged = 0
+        while True:
+            keys = list(expired.values_list(
+                'session_key', flat=True
+            )[:options['chunk_size']])
+            if not keys:
+                break
+            purged += Session.objects.filter(session_key__in=keys).delete()[0]
+            self.stdout.write(f'Удалено сессий: {purged}')
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {purged} сессий за '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
@@ -0,0 +1,56 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from yanote.instrumentation import MIDDLEWARE_PATH, recording, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        'Запрашивает адреса внутри процесса и выводит по именам URL '
+        'число запросов к базе, повторы и время ответа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='Адреса, например /.')
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Сколько раз запросить каждый адрес.',
+        )
+        parser.add_argument(
+            '--user', help='Имя пользователя, от которого идут запросы.'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести сводку в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        client = Client(SERVER_NAME='localhost')
+        if options['user']:
+            client.force_login(
+                get_user_model().objects.get(username=options['user'])
+            )
+        middleware = list(settings.MIDDLEWARE)
+        if MIDDLEWARE_PATH not in middleware:
+            middleware.insert(0, MIDDLEWARE_PATH)
+        with override_settings(MIDDLEWARE=middleware), recording() as records:
+            for _ in range(options['repeat']):
+                for url in options['urls']:
+                    client.get(url)
+        summary = summarize(records)
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+        for view_name, stats in summary.items():
+            self.stdout.write(
+                f'{view_name}: {stats["requests"]} ответов, '
+                f'запросов {stats["queries_avg"]:.1f} '
+                f'(макс. {stats["queries_max"]}), '
+                f'повторов до {stats["duplicates_max"]}, '
+                f'база {stats["db_ms_avg"]:.2f} мс, '
+                f'шаблон {stats["template_ms_avg"]:.2f} мс, '
+                f'всего {stats["total_ms_avg"]:.2f} мс'
+            )
@@ -0,0 +1,62 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+CHUNK_SIZE = 1000
+
+# Таблица и стемминг записаны здесь как есть, а не берутся
+# из notes.search: миграция должна работать и после его изменений.
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+
+
+def stem_text(text, stemmers):
+    return ' '.join(
+        stemmers[
+            'russian' if CYRILLIC_RE.search(word) else 'english'
+        ].stemWord(word)
+        for word in WORD_RE.findall(text.lower())
+    )
+
+
+def fill_search_index(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    stemmers = {
+        language: snowballstemmer.stemmer(language)
+        for language in ('russian', 'english')
+    }
+    last_id = 0
+    while True:
+        rows = list(Note.objects.filter(pk__gt=last_id).order_by(
+            'pk'
+        ).values_list('pk', 'title', 'text', 'author_id')[:CHUNK_SIZE])
+        if not rows:
+            break
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO notes_note_search (rowid, title, text, '
+                'author_id) VALUES (%s, %s, %s, %s)',
+                [
+                    [pk, stem_text(title, stemmers),
+                     stem_text(text, stemmers), author_id]
+                    for pk, title, text, author_id in rows
+                ],
+            )
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE VIRTUAL TABLE notes_note_search USING fts5(title, text, '
+            "author_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')",
+            'DROP TABLE notes_note_search',
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
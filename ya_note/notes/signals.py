@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .models import Note
+from .search import NOTE_INDEX
+
+
+@receiver(post_save, sender=Note)
+def note_indexed(sender, instance, **kwargs):
+    NOTE_INDEX.add([instance])
+
+
+@receiver(post_delete, sender=Note)
+def note_unindexed(sender, instance, **kwargs):
+    NOTE_INDEX.remove([instance.pk])
+
+
+@receiver(post_migrate)
+def search_index_pruned(sender, **kwargs):
+    """
+    Чистит индекс после flush.
+
+    TransactionTestCase после каждого теста очищает таблицу заметок
+    через flush, без post_delete, и те же pk достаются новым заметкам.
+    """
+    if sender.name == 'notes':
+        NOTE_INDEX.prune(Note)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS из настроек к новому соединению."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
@@ -0,0 +1,85 @@
+"""
+Подбор уникального slug для заметки.
+
+Все занятые варианты ``base``, ``base-2``, ``base-3``... читаются
+одним запросом по диапазону уникального индекса. Гонку с параллельным
+созданием заметки с тем же slug ловит сам индекс: сохранение идёт
+в точке сохранения и при IntegrityError повторяется со следующим
+свободным вариантом.
+"""
+from functools import lru_cache
+from itertools import count
+
+from django.db import IntegrityError, transaction
+from pytils.translit import slugify
+
+SAVE_ATTEMPTS = 10
+# Место под самый длинный суффикс, который ожидаем: «-999999».
+SUFFIX_RESERVE = 7
+DEFAULT_SLUG = 'note'
+
+
+@lru_cache(maxsize=1024)
+def transliterate(title):
+    """Транслитерация повторяющихся заголовков считается один раз."""
+    return slugify(title)
+
+
+def base_slug(title, max_length):
+    return transliterate(title)[:max_length] or DEFAULT_SLUG
+
+
+def candidates(base, max_length):
+    """Варианты slug по порядку: base, base-2, base-3..."""
+    yield base
+    for number in count(2):
+        suffix = f'-{number}'
+        yield base[:max_length - len(suffix)] + suffix
+
+
+def taken_slugs(queryset, base, max_length):
+    """
+    Занятые варианты slug одним запросом по диапазону индекса.
+
+    Все ``base-N`` лежат между ``base`` и ``base.``, потому что «-»
+    идёт в таблице символов прямо перед «.». Если у длинного base
+    суффикс придётся писать поверх обрезанного конца, диапазон
+    строится по его неизменной части.
+    """
+    if len(base) + SUFFIX_RESERVE <= max_length:
+        low, high = base, base + '.'
+    else:
+        low = base[:max_length - SUFFIX_RESERVE]
+        high = low + chr(0x10FFFF)
+    return set(queryset.filter(
+        slug__gte=low, slug__lt=high
+    ).values_list('slug', flat=True))
+
+
+def allocate_slug(queryset, base, max_length):
+    taken = taken_slugs(queryset, base, max_length)
+    for candidate in candidates(base, max_length):
+        if candidate not in taken:
+            return candidate
+
+
+def save_with_unique_slug(instance, save):
+    """
+    Сохраняет объект, подобрав ему свободный slug по заголовку.
+
+    save — функция, которая сохраняет объект в базу; её вызов
+    повторяется, если slug успели занять параллельно.
+    """
+    max_length = instance._meta.get_field('slug').max_length
+    base = base_slug(instance.title, max_length)
+    queryset = type(instance)._default_manager.exclude(pk=instance.pk)
+    for attempt in range(1, SAVE_ATTEMPTS + 1):
+        instance.slug = allocate_slug(queryset, base, max_length)
+        try:
+            with transaction.atomic():
+                save()
+            return
+        except IntegrityError:
+            if attempt == SAVE_ATTEMPTS:
+                instance.slug = ''
+                raise
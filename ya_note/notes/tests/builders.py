@@ -0,0 +1,51 @@
+"""
+Построители тестовых данных для setUpTestData.
+
+Каждый построитель создаёт объекты одним bulk_create и сам делает то,
+что сделали бы сигналы: добавляет заметки в поисковый индекс и сбрасывает
+пользователей с теми же pk в кэше. Возвращаются
+объекты с pk в порядке создания.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+
+from notes.auth import forget_user
+from notes.models import Note
+from notes.search import NOTE_INDEX
+
+User = get_user_model()
+
+
+def _bulk_insert(model, objects):
+    """bulk_create с pk: SQLite их не возвращает, строки перечитываются."""
+    with transaction.atomic():
+        last_id = model.objects.aggregate(last_id=Max('pk'))['last_id']
+        model.objects.bulk_create(objects)
+        return list(
+            model.objects.filter(pk__gt=last_id or 0).order_by('pk')
+        )
+
+
+def build_users(*usernames):
+    users = _bulk_insert(User, [
+        User(username=username) for username in usernames
+    ])
+    for user in users:
+        forget_user(user.pk)
+    return users
+
+
+def build_notes(author, count, title='Заметка', text='Текст', slug='note'):
+    """Заметки автора числом count с адресами slug-0, slug-1 и так далее."""
+    notes = _bulk_insert(Note, [
+        Note(
+            title=f'{title} {index}',
+            text=f'{text} {index}',
+            slug=f'{slug}-{index}',
+            author=author,
+        )
+        for index in range(count)
+    ])
+    NOTE_INDEX.add(notes)
+    return notes
@@ -0,0 +1 @@
+from yanote.testing import pytest_runtest_call  # noqa: F401
@@ -1,10 +1,13 @@
 """Тесты контента."""
-from django.test import TestCase, Client
+import json
+
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from notes.models import Note
 from notes.forms import NoteForm
+from notes.tests.builders import build_notes, build_users
 
 User = get_user_model()
 
@@ -45,6 +48,20 @@ class TestNoteVisibility(TestCase):
                     self.note in object_list,
                     expected)
 
+    def test_note_visibility_in_search(self):
+        """Проверка, поиск находит словоформы только в своих заметках."""
+        test_cases = (
+            (self.author_client, [self.note]),
+            (self.reader_client, []),
+        )
+        url = reverse('notes:search')
+        for client, expected in test_cases:
+            with self.subTest(client=client):
+                response = client.get(url, {'q': 'текстами'})
+                self.assertEqual(
+                    list(response.context['object_list']), expected
+                )
+
     def test_pages_contains_form(self):
         """Проверка формы на страницах создания и редактирования заметки."""
         test_cases = [
@@ -57,3 +74,58 @@ class TestNoteVisibility(TestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+
+@override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+class TestNotesListPages(TestCase):
+    """Тесты постраничного списка и выгрузки заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создание автора с пятью заметками и чужой заметки."""
+        cls.author, cls.reader = build_users(
+            'Лев Толстой', 'Читатель простой'
+        )
+        cls.notes = build_notes(cls.author, 5)
+        build_notes(cls.reader, 1, title='Чужая', slug='other')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def test_list_pages(self):
+        """Проверка, страницы списка идут по id без пропусков и повторов."""
+        url = reverse('notes:list')
+        response = self.author_client.get(url)
+        pages = [response.context['object_list']]
+        next_cursor = response.context['next_cursor']
+        while next_cursor is not None:
+            response = self.author_client.get(url, {'after': next_cursor})
+            pages.append(response.context['object_list'])
+            next_cursor = response.context['next_cursor']
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(
+            [note.slug for page in pages for note in page],
+            [note.slug for note in self.notes]
+        )
+
+    def test_list_loads_only_rendered_fields(self):
+        """Проверка, текст заметок для списка не загружается."""
+        response = self.author_client.get(reverse('notes:list'))
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+    def test_export(self):
+        """Проверка выгрузки заметок в NDJSON и JSON."""
+        expected = list(
+            Note.objects.filter(author=self.author).order_by('id').values(
+                'id', 'title', 'text', 'slug'
+            )
+        )
+        url = reverse('notes:export')
+        response = self.author_client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+        response = self.author_client.get(url, {'format': 'json'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(json.loads(content), expected)
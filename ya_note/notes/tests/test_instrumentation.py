@@ -0,0 +1,47 @@
+"""Тесты замеров запросов к базе."""
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.models import Note
+from yanote.instrumentation import recording
+
+User = get_user_model()
+
+
+class TestInstrumentation(TestCase):
+    """Замеры ответов view и команда viewstats."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создание автора, заметки и клиента."""
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', author=cls.author
+        )
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def test_list_recorded(self):
+        """Проверка, список заметок записан с числом запросов."""
+        with recording() as records:
+            response = self.author_client.get(reverse('notes:list'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].view_name, 'notes:list')
+        self.assertEqual(records[0].queries, 3)
+        self.assertEqual(records[0].duplicates, 0)
+
+    def test_viewstats_command(self):
+        """Проверка, команда выводит сводку по именам URL."""
+        out = StringIO()
+        call_command(
+            'viewstats', reverse('notes:home'), '--repeat', '2', '--json',
+            stdout=out,
+        )
+        summary = json.loads(out.getvalue())
+        self.assertEqual(summary['notes:home']['requests'], 2)
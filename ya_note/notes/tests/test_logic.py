@@ -1,12 +1,27 @@
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
+from tempfile import TemporaryDirectory
+from threading import Barrier, Thread
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from pytils.translit import slugify
 
 from notes.models import Note
 from notes.forms import WARNING
+from yanote.ratelimit import RateLimitMiddleware
 
 
 User = get_user_model()
@@ -73,6 +88,60 @@ class TestNoteCreation(TestCase):
         excepted_slug = slugify(self.form_data['title'])
         self.assertEqual(created_note.slug, excepted_slug)
 
+    def test_slug_auto_generation_skips_taken(self):
+        """Проверка, занятый slug из заголовка получает номер."""
+        self.form_data.pop('slug')
+        base = slugify(self.form_data['title'])
+        for slug in (base, f'{base}-2'):
+            Note.objects.create(
+                title='Другая заметка', text='Текст',
+                slug=slug, author=self.user,
+            )
+        response = self.auth_client.post(self.url, data=self.form_data)
+        self.assertRedirects(response, reverse('notes:success'))
+        created_note = Note.objects.latest('id')
+        self.assertEqual(created_note.slug, f'{base}-3')
+
+
+@override_settings(RATE_LIMITS={'notes:add': (1, 3600)})
+class TestNoteRateLimit(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Лев Толстой')
+
+    def setUp(self):
+        caches[settings.RATE_LIMIT_CACHE].clear()
+        self.client.force_login(self.user)
+
+    def test_notes_over_limit_rejected(self):
+        """Проверка, сверх лимита заметки не создаются, а ответ — 429."""
+        url = reverse('notes:add')
+        for slug in ('first', 'second'):
+            response = self.client.post(url, data={
+                'title': 'Заголовок', 'text': 'Текст', 'slug': slug,
+            })
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(
+            list(Note.objects.values_list('slug', flat=True)), ['first']
+        )
+
+    def test_file_based_cache_rejected(self):
+        """Проверка, счётчики лимитов нельзя хранить в FileBasedCache."""
+        with TemporaryDirectory() as location:
+            with override_settings(CACHES={
+                **settings.CACHES,
+                settings.RATE_LIMIT_CACHE: {
+                    'BACKEND': (
+                        'django.core.cache.backends.filebased.FileBasedCache'
+                    ),
+                    'LOCATION': location,
+                },
+            }):
+                with self.assertRaises(ImproperlyConfigured):
+                    RateLimitMiddleware(lambda request: None)
+
 
 class TestNoteEditDelete(TestCase):
 
@@ -136,3 +205,99 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         notes_count = Note.objects.count()
         self.assertEqual(notes_count, 1)
+
+
+class TestCachedUser(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Лев Толстой')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_user_loaded_from_cache(self):
+        """Проверка, пользователь берётся из кэша, пока его не изменят."""
+        url = reverse('notes:list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'FROM "auth_user"' in query['sql']
+        ])
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_model_backend_session_kept(self):
+        """Проверка, сессия, открытая через ModelBackend, не теряется."""
+        self.client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class TestPurgeSessions(TestCase):
+
+    def test_purge_sessions(self):
+        """Проверка, команда удаляет пачками только истёкшие сессии."""
+        now = timezone.now()
+        Session.objects.bulk_create([
+            Session(
+                session_key=f'expired{index}', session_data='',
+                expire_date=now - timedelta(days=1),
+            )
+            for index in range(5)
+        ] + [
+            Session(session_key='active', session_data='',
+                    expire_date=now + timedelta(days=1)),
+        ])
+        call_command(
+            'purge_sessions', '--chunk-size', '2', stdout=StringIO()
+        )
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['active'],
+        )
+
+
+class TestSlugConcurrency(TransactionTestCase):
+    """Одновременное создание заметок с одинаковым заголовком."""
+
+    THREADS = 8
+
+    def test_concurrent_notes_get_unique_slugs(self):
+        """Проверка, параллельные заметки получают разные slug."""
+        author = User.objects.create(username='Автор заметки')
+        barrier = Barrier(self.THREADS)
+        errors = []
+
+        def create_note():
+            try:
+                barrier.wait()
+                Note.objects.create(
+                    title='Одинаковый заголовок', text='Текст',
+                    author=author,
+                )
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=create_note) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        base = slugify('Одинаковый заголовок')
+        expected = {base} | {
+            f'{base}-{number}' for number in range(2, self.THREADS + 1)
+        }
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)), expected
+        )
@@ -0,0 +1,61 @@
+"""Тесты планов запросов."""
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)\S+$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite.')
+class TestQueryPlans(TestCase):
+    """Запросы страниц заметок должны идти по индексам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создание автора, его заметки и клиента."""
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', author=cls.author
+        )
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def explain(self, url):
+        """Планы всех SELECT-запросов, выполненных по адресу."""
+        with CaptureQueriesContext(connection) as context:
+            self.author_client.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans[query['sql']] = [row[-1] for row in cursor.fetchall()]
+        return plans
+
+    def test_views_use_indexes(self):
+        """Проверка, запросы страниц не читают таблицы целиком."""
+        urls = (
+            ('notes:list', None),
+            ('notes:detail', (self.note.slug,)),
+            ('notes:edit', (self.note.slug,)),
+            ('notes:delete', (self.note.slug,)),
+        )
+        for name, args in urls:
+            with self.subTest(name=name):
+                plans = self.explain(reverse(name, args=args))
+                self.assertTrue(plans)
+                for sql, plan in plans.items():
+                    full_scans = [
+                        step for step in plan if FULL_SCAN.match(step)
+                    ]
+                    self.assertFalse(full_scans, f'{sql}\n{plan}')
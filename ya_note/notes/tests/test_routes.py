@@ -45,6 +45,8 @@ class TestRoutes(TestCase):
         """Проверка доступа страниц для авторизованных пользователей."""
         urls = (
             'notes:list',
+            'notes:export',
+            'notes:search',
             'notes:add',
             'notes:success',
         )
@@ -72,6 +74,8 @@ class TestRoutes(TestCase):
         login_url = reverse('users:login')
         urls = (
             ('notes:list', None),
+            ('notes:export', None),
+            ('notes:search', None),
             ('notes:add', None),
             ('notes:edit', (self.note.slug,)),
             ('notes:delete', (self.note.slug,)),
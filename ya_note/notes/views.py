@@ -1,9 +1,15 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import NOTE_INDEX
 
 
 class Home(generic.TemplateView):
@@ -26,22 +32,34 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Сохранение формы заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Slug, занятый между проверкой формы и сохранением,
+        показываем как ошибку формы.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,8 +68,96 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список всех заметок пользователя.
+
+    Заметки выводятся страницами по id: следующая страница начинается
+    после последнего показанного id, без OFFSET. Из базы читаются
+    только поля, которые есть в шаблоне.
+    """
     template_name = 'notes/list.html'
+    cursor_param = 'after'
+
+    def get_queryset(self):
+        notes = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        after = self.request.GET.get(self.cursor_param)
+        if after is not None:
+            try:
+                notes = notes.filter(id__gt=int(after))
+            except ValueError:
+                raise Http404
+        return notes[:settings.NOTES_COUNT_ON_LIST_PAGE + 1]
+
+    def get_context_data(self, **kwargs):
+        per_page = settings.NOTES_COUNT_ON_LIST_PAGE
+        notes = list(self.object_list)
+        next_cursor = None
+        if len(notes) > per_page:
+            notes = notes[:per_page]
+            next_cursor = notes[-1].pk
+        context = super().get_context_data(object_list=notes, **kwargs)
+        context['next_cursor'] = next_cursor
+        return context
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        """Ищем только среди заметок, доступных пользователю."""
+        self.query = self.request.GET.get('q', '').strip()
+        return NOTE_INDEX.search(
+            super().get_queryset(), self.query,
+            author_id=self.request.user.pk,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
+
+
+class NotesExport(NoteBase, generic.View):
+    """
+    Выгрузка всех заметок пользователя.
+
+    Заметки читаются из базы пачками и сразу отдаются клиенту,
+    поэтому память не растёт с числом заметок. По умолчанию формат
+    NDJSON — по объекту на строку, с ?format=json — один JSON-массив.
+    """
+    fields = ('id', 'title', 'text', 'slug')
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        notes = self.get_queryset().order_by('id').values(
+            *self.fields
+        ).iterator(chunk_size=self.chunk_size)
+        if request.GET.get('format') == 'json':
+            content = self.as_json(notes)
+            content_type, extension = 'application/json', 'json'
+        else:
+            content = self.as_ndjson(notes)
+            content_type, extension = 'application/x-ndjson', 'ndjson'
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{extension}"'
+        )
+        return response
+
+    @staticmethod
+    def as_ndjson(notes):
+        for note in notes:
+            yield json.dumps(note, ensure_ascii=False) + '\n'
+
+    @staticmethod
+    def as_json(notes):
+        yield '['
+        for index, note in enumerate(notes):
+            yield (',' if index else '') + json.dumps(note, ensure_ascii=False)
+        yield ']'
 
 
 class NoteDetail(NoteBase, generic.DetailView):
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 с числом итераций из настройки PASSWORD_HASH_ITERATIONS.
+
+    Хеши с другим числом итераций проверяются как обычно и при входе
+    пересчитываются с новым.
+    """
+
+    @property
+    def iterations(self):
+        return (
+            settings.PASSWORD_HASH_ITERATIONS
+            or hashers.PBKDF2PasswordHasher.iterations
+        )
@@ -0,0 +1,83 @@
+"""
+Ограничение частоты запросов, изменяющих данные.
+
+Лимиты задаются в настройке RATE_LIMITS по именам URL: не больше
+requests запросов за period секунд от одного пользователя, а от
+анонимного — с одного IP. Это token bucket, который пополняется
+целиком в начале каждого периода: так проверка стоит одного
+cache.incr. Непрерывное пополнение потребовало бы прочитать и записать
+состояние ведра, то есть двух обращений к кэшу, и без compare-and-set
+параллельные запросы теряли бы списания. Цена — на границе периодов
+клиент может успеть сделать до 2 * requests запросов подряд.
+
+Сверх лимита view не вызывается, клиент получает ответ 429
+с заголовком Retry-After.
+
+Счётчики хранятся в кэше RATE_LIMIT_CACHE, у бэкенда которого incr
+должен быть атомарным: LocMemCache или Memcached. FileBasedCache
+и кэш в базе делают incr через get и set, теряют параллельные
+списания и при каждом set сбрасывают время жизни ключа, поэтому
+с ними middleware не запускается.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+KEY = 'ratelimit:{}:{}:{}'
+MESSAGE = 'Слишком много запросов, попробуйте позже.'
+
+
+def client_id(request):
+    if request.user.is_authenticated:
+        return f'user{request.user.pk}'
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def hit(key, period):
+    """Списывает запрос и возвращает, сколько их было за период."""
+    cache = caches[settings.RATE_LIMIT_CACHE]
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Первый запрос периода: ключа ещё нет.
+        if cache.add(key, 1, period):
+            return 1
+        return cache.incr(key)
+
+
+class RateLimitMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        backend = type(caches[settings.RATE_LIMIT_CACHE])
+        if backend.incr is BaseCache.incr:
+            raise ImproperlyConfigured(
+                f'У кэша {settings.RATE_LIMIT_CACHE!r} ({backend.__name__}) '
+                'incr не атомарный, счётчики лимитов в нём хранить нельзя.'
+            )
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        view_name = request.resolver_match.view_name
+        limit = settings.RATE_LIMITS.get(view_name)
+        if limit is None:
+            return None
+        requests, period = limit
+        now = time.time()
+        window = int(now // period)
+        key = KEY.format(view_name, client_id(request), window)
+        if hit(key, period) <= requests:
+            return None
+        response = HttpResponse(MESSAGE, status=429)
+        response['Retry-After'] = math.ceil((window + 1) * period - now)
+        return response
@@ -1,5 +1,8 @@
+import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,6 +32,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanote.ratelimit.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
@@ -56,6 +60,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле, а не в памяти: тесты с потоками
+        # обращаются к ней через отдельные соединения. При параллельном
+        # прогоне у каждого процесса своя база из DJANGO_TEST_DB.
+        'TEST': {
+            'NAME': os.getenv(
+                'DJANGO_TEST_DB', BASE_DIR / 'test_db.sqlite3'
+            ),
+        },
     }
 }
 
@@ -69,6 +81,48 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хешеры паролей по профилям, профиль выбирает DJANGO_PASSWORD_HASHERS.
+# fast проверяет старые хеши, но новые считает MD5 без итераций: это
+# только для тестов и нагрузочных прогонов, тесты включают его сами,
+# см. yanote/testing.py.
+PASSWORD_HASHER_PROFILES = {
+    'default': [
+        'yanote.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ],
+}
+PASSWORD_HASHER_PROFILES['fast'] = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    *PASSWORD_HASHER_PROFILES['default'],
+]
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[
+    os.getenv('DJANGO_PASSWORD_HASHERS', 'default')
+]
+# Число итераций PBKDF2, по умолчанию — как в Django. Чем меньше,
+# тем дешевле вход и тем легче подобрать пароль по утёкшему хешу.
+PASSWORD_HASH_ITERATIONS = int(os.getenv('DJANGO_PASSWORD_ITERATIONS', 0))
+
+# Пользователь для каждого запроса берётся из кэша, см. notes/auth.py.
+# В сессиях, открытых до появления кэша, записан ModelBackend: без него
+# в списке эти пользователи разлогинились бы.
+AUTHENTICATION_BACKENDS = [
+    'notes.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_TIMEOUT = 60 * 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+    },
+}
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -87,3 +141,113 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 50
+
+SEARCH_RESULTS_LIMIT = 20
+# Среди скольких последних совпадений выбирать лучшие результаты.
+SEARCH_CANDIDATES = 1000
+
+# Замеры запросов к базе и времени ответа, см. yanote/instrumentation.py.
+INSTRUMENTATION_ENABLED = os.getenv('DJANGO_INSTRUMENTATION') == '1'
+INSTRUMENTATION_BUFFER_SIZE = 1000
+
+# Сколько запросов к базе может выполнить один ответ view.
+# Точки сохранения транзакций тоже считаются запросами.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:detail': 3,
+    'notes:add': 9,
+    'notes:edit': 8,
+    'notes:delete': 5,
+    'notes:search': 4,
+    'notes:success': 2,
+}
+
+# Сколько запросов, изменяющих данные, можно сделать за период
+# в секундах: имя URL -> (запросов, период). См. yanote/ratelimit.py.
+# Счётчики хранятся в кэше RATE_LIMIT_CACHE с атомарным incr.
+RATE_LIMIT_CACHE = 'ratelimit'
+RATE_LIMITS = {
+    'notes:add': (30, 60),
+}
+
+if INSTRUMENTATION_ENABLED:
+    MIDDLEWARE.insert(0, 'yanote.instrumentation.InstrumentationMiddleware')
+
+# Хранилища сессий, DJANGO_SESSIONS выбирает одно из них. db читает
+# таблицу django_session на каждом запросе с сессией; cached_db читает
+# кэш, а базу — только при промахе; signed_cookies хранит сессию
+# в подписанной cookie и к базе не обращается, но выход из аккаунта
+# не отзывает уже выданную cookie. Истёкшие сессии из таблицы удаляет
+# команда purge_sessions.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.getenv('DJANGO_SESSIONS', 'db')]
+
+# Профиль окружения: DJANGO_ENV=production включает настройки для боевого
+# сервера, по умолчанию остаются настройки для разработки и тестов.
+ENVIRONMENT = os.getenv('DJANGO_ENV', 'development')
+
+# PRAGMA, которые выполняются на каждом новом соединении с SQLite.
+SQLITE_PRAGMAS = {}
+
+if ENVIRONMENT == 'production':
+    # Ключ из репозитория известен всем: с ним можно подделать
+    # сессии и подписанные данные.
+    SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
+    if not SECRET_KEY:
+        raise ImproperlyConfigured(
+            'При DJANGO_ENV=production нужна переменная DJANGO_SECRET_KEY.'
+        )
+    DEBUG = False
+    ALLOWED_HOSTS = os.getenv(
+        'DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1'
+    ).split(',')
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        # Отрицательное значение — размер в КиБ, а не в страницах.
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    SESSION_ENGINE = SESSION_ENGINES[
+        os.getenv('DJANGO_SESSIONS', 'cached_db')
+    ]
+    # MD5 из профиля fast пересчитал бы при входе пароли пользователей.
+    PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES['default']
+    # Пользователи в кэше должны сбрасываться во всех процессах
+    # сервера, locmem у каждого процесса свой.
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv(
+                'DJANGO_CACHE_DIR',
+                os.path.join(tempfile.gettempdir(), 'yanote-cache'),
+            ),
+        },
+        # Счётчикам лимитов FileBasedCache не подходит: incr в нём
+        # не атомарный. В locmem лимиты считаются в каждом процессе
+        # отдельно, то есть при N процессах допускают до N * requests
+        # запросов. Общий для всех процессов счётчик — Memcached
+        # по адресу из DJANGO_RATELIMIT_MEMCACHED.
+        RATE_LIMIT_CACHE: CACHES[RATE_LIMIT_CACHE],
+    }
+    if os.getenv('DJANGO_RATELIMIT_MEMCACHED'):
+        CACHES[RATE_LIMIT_CACHE] = {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('DJANGO_RATELIMIT_MEMCACHED'),
+        }